@@ -0,0 +1,121 @@
+'''
+Benchmarks walking a tree in listing order against inode order.
+
+Each run walks the whole tree and stats every file, on a cold page
+cache if the caches can be dropped (needs root), otherwise warm and
+the numbers say little about the disk. Runs of the two orders take
+turns so neither one profits from the other's leftovers.
+
+    sudo python benchmarks/bench_inode_order.py /mnt/archive --runs 5
+
+Without a path a synthetic tree is created in a temporary directory
+under the current one, so it lands on the disk it's run from:
+
+    python benchmarks/bench_inode_order.py --create 50000
+'''
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'vizex'))
+
+from vizexdf.scanner import TreeScanner  # noqa: E402
+
+
+def drop_caches() -> bool:
+    """
+    Flushes dirty pages and drops the page, dentry and inode caches.
+
+    Returns:
+        bool: whether the caches were actually dropped
+    """
+    os.sync()
+    try:
+        with open('/proc/sys/vm/drop_caches', 'w') as f:
+            f.write('3\n')
+    except OSError:
+        return False
+    return True
+
+
+def create_tree(root: str, files: int, per_dir: int = 500) -> None:
+    """
+    Creates `files` small files spread over directories. Files are
+    created and renamed in a random order so the listing order of a
+    directory has little to do with the order of its inodes.
+    """
+    rng = random.Random(0)
+    names = list(range(files))
+    rng.shuffle(names)
+    for i, name in enumerate(names):
+        folder = os.path.join(root, f'dir{name % (files // per_dir + 1)}')
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f'tmp{i}'), 'wb') as f:
+            f.write(b'0' * rng.randrange(1, 4096))
+        os.rename(os.path.join(folder, f'tmp{i}'),
+                  os.path.join(folder, f'file{name}'))
+
+
+def timed_walk(path: str, inode_order: bool, cold: bool) -> tuple:
+    """
+    Returns:
+        tuple: seconds the walk took and whether the cache was cold
+    """
+    if cold:
+        cold = drop_caches()
+    scanner = TreeScanner(with_files=True, inode_order=inode_order)
+    start = time.perf_counter()
+    for _ in scanner.walk(path):
+        pass
+    return time.perf_counter() - start, cold
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', nargs='?', help='tree to walk')
+    parser.add_argument('--runs', type=int, default=3,
+                        help='walks per order (default 3)')
+    parser.add_argument('--create', type=int, default=20000, metavar='N',
+                        help='files of the synthetic tree (default 20000)')
+    parser.add_argument('--warm', action='store_true',
+                        help="don't drop the caches between runs")
+    args = parser.parse_args()
+
+    path = args.path
+    tmp = None
+    if path is None:
+        tmp = tempfile.TemporaryDirectory(dir=os.getcwd())
+        path = tmp.name
+        print(f'Creating {args.create} files in {path} ...')
+        create_tree(path, args.create)
+
+    times = {False: [], True: []}
+    cold = not args.warm
+    try:
+        for run in range(args.runs):
+            for inode_order in (run % 2 == 0, run % 2 != 0):
+                seconds, cold = timed_walk(path, inode_order, cold)
+                times[inode_order].append(seconds)
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    cache = 'cold' if cold else 'warm (caches not dropped, run as root)'
+    print(f'{path}: {args.runs} runs per order, {cache} cache')
+    for inode_order, label in ((False, 'listing order'),
+                               (True, 'inode order')):
+        median = statistics.median(times[inode_order])
+        print(f'  {label:14} median {median:.3f}s'
+              + f'  min {min(times[inode_order]):.3f}s')
+    speedup = statistics.median(times[False]) / statistics.median(times[True])
+    print(f'  inode order is {speedup:.2f}x as fast')
+
+
+if __name__ == '__main__':
+    main()
@@ -17,9 +17,12 @@ setup(
     url='https://github.com/bexxmodd/vizex',
     package_dir = {'': 'vizex'},
     py_modules=[
-        'cli', 'vizexdu/disks', 'tools',
+        'cli', 'vizexdu/disks', 'tools', 'ignore',
         'vizexdu/charts', 'vizexdu/battery', 'vizexdu/cpu',
-        'vizexdf/files', 'vizextree/viztree'
+        'vizexdf/files', 'vizexdf/scanner', 'vizexdf/cache',
+        'vizexdf/filetypes', 'vizexdf/columns', 'vizexdf/output',
+        'vizexdf/watch', 'vizexdf/snapshot', 'vizexdf/pool',
+        'vizexdf/devices', 'vizextree/viztree', 'vizextree/highlight'
     ],
     packages = find_packages(where='vizex'),
     classifiers=[
@@ -0,0 +1,114 @@
+# add path to the main package and test cache.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import io
+import os
+import time
+import sqlite3
+import tempfile
+import unittest
+import unittest.mock
+
+from vizexdf.cache import SizeCache
+from vizexdf.scanner import TreeScanner
+
+
+class TestSizeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmpd.name, 'cache', 'sizes.sqlite3')
+        self.tree = os.path.join(self.tmpd.name, 'tree')
+        self.sub = os.path.join(self.tree, 'sub')
+        os.makedirs(self.sub)
+        for folder in (self.tree, self.sub):
+            with open(os.path.join(folder, 'file'), 'wb') as f:
+                f.write(b'0' * 100)
+        # push mtimes out of the racy window so the records get stored
+        past = time.time() - 60
+        for folder in (self.tree, self.sub):
+            os.utime(folder, (past, past))
+
+    def tearDown(self):
+        self.tmpd.cleanup()
+
+    def test_store_and_lookup(self):
+        stat = os.stat(self.tree)
+        with SizeCache(self.db) as cache:
+            cache.store(stat, 100, ['sub'])
+            cache.flush()
+            self.assertEqual((100, ['sub']), cache.lookup(stat))
+
+    def test_names_that_are_not_utf8(self):
+        name = os.fsdecode(b'bad\xff')
+        stat = os.stat(self.tree)
+        with SizeCache(self.db) as cache:
+            cache.store(stat, 100, [name, 'sub'])
+        with SizeCache(self.db) as cache:
+            self.assertEqual((100, [name, 'sub']), cache.lookup(stat))
+
+    def test_records_of_older_versions_are_dropped(self):
+        os.makedirs(os.path.dirname(self.db))
+        db = sqlite3.connect(self.db)
+        db.execute('CREATE TABLE dirs (dev INTEGER, ino INTEGER,'
+                   ' mtime_ns INTEGER, size INTEGER, subdirs TEXT,'
+                   ' scanned REAL, used REAL, PRIMARY KEY (dev, ino))')
+        db.execute("INSERT INTO dirs VALUES (1, 2, 3, 4, 'a/b', 5, 6)")
+        db.commit()
+        db.close()
+        with SizeCache(self.db) as cache:
+            count = cache._db.execute('SELECT COUNT(*) FROM dirs').fetchone()
+            self.assertEqual(0, count[0])
+
+    def test_close_when_flush_fails(self):
+        cache = SizeCache(self.db)
+        with unittest.mock.patch.object(
+                cache, '_flush', side_effect=sqlite3.OperationalError), \
+                unittest.mock.patch('sys.stderr', new_callable=io.StringIO):
+            cache.close()
+        self.assertRaises(sqlite3.ProgrammingError, cache._db.execute,
+                          'SELECT 1')
+
+    def test_lookup_misses_after_mtime_change(self):
+        with SizeCache(self.db) as cache:
+            cache.store(os.stat(self.tree), 100, ['sub'])
+            cache.flush()
+            os.utime(self.tree, (1, 1))
+            self.assertIsNone(cache.lookup(os.stat(self.tree)))
+
+    def test_lookup_misses_expired_records(self):
+        stat = os.stat(self.tree)
+        with SizeCache(self.db, max_age=-1) as cache:
+            cache.store(stat, 100, ['sub'])
+            cache.flush()
+            self.assertIsNone(cache.lookup(stat))
+
+    def test_recently_modified_dirs_are_not_stored(self):
+        os.utime(self.tree)
+        stat = os.stat(self.tree)
+        with SizeCache(self.db) as cache:
+            cache.store(stat, 100, ['sub'])
+            cache.flush()
+            self.assertIsNone(cache.lookup(stat))
+
+    def test_close_trims_to_max_entries(self):
+        with SizeCache(self.db, max_entries=1) as cache:
+            cache.store(os.stat(self.tree), 100, ['sub'])
+            cache.store(os.stat(self.sub), 100, [])
+        with SizeCache(self.db) as cache:
+            count = cache._db.execute('SELECT COUNT(*) FROM dirs').fetchone()
+            self.assertEqual(1, count[0])
+
+    def test_scanner_reuses_cached_subtrees(self):
+        with SizeCache(self.db) as cache:
+            self.assertEqual(200, TreeScanner(cache=cache).total_size(self.tree))
+        with SizeCache(self.db) as cache, \
+                unittest.mock.patch('os.scandir') as scandir:
+            self.assertEqual(200, TreeScanner(cache=cache).total_size(self.tree))
+            scandir.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -119,6 +119,11 @@ class TestHorizontalBarChart(unittest.TestCase):
         except Exception as e:
             self.fail(f'Exception occured when trying to draw a full bar chart {e}')
 
+    def test_draw_horizontal_bar_width(self):
+        self.assertEqual(
+            '█████▒░░░░░', self.horizontal_chart.draw_horizontal_bar(
+                10, 5, width=10))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -5,8 +5,10 @@ if __name__ == '__main__':
 
 
 import io
+import os
 import random
 import psutil
+import tempfile
 import unittest
 import unittest.mock
 
@@ -37,6 +39,31 @@ class TestCli(unittest.TestCase):
         except Exception as e:
             self.fail(f'Exception occured when calling vizexdf\'s --help {e}')
 
+    def test_dirs_files_io_limit(self):
+        runner = CliRunner()
+        result = runner.invoke(dirs_files, ['--io-limit', 'rotational=1',
+                                            '--io-limit', 'network=8'])
+        self.assertEqual(0, result.exit_code)
+        result = runner.invoke(dirs_files, ['--io-limit', 'floppy=1'])
+        self.assertNotEqual(0, result.exit_code)
+        result = runner.invoke(dirs_files, ['--io-limit', 'ssd=0'])
+        self.assertNotEqual(0, result.exit_code)
+
+    def test_dirs_files_since_bad_snapshot(self):
+        runner = CliRunner()
+        with tempfile.TemporaryDirectory() as tmpd:
+            empty = os.path.join(tmpd, 'empty')
+            open(empty, 'wb').close()
+            result = runner.invoke(dirs_files, ['--since', empty])
+            self.assertEqual(1, result.exit_code)
+            self.assertIn('not a vizex snapshot', result.output)
+            other, snap = os.path.join(tmpd, 'a'), os.path.join(tmpd, 'snap')
+            os.mkdir(other)
+            runner.invoke(dirs_files, [other, '--save-snapshot', snap])
+            result = runner.invoke(dirs_files, [tmpd, '--since', snap])
+            self.assertEqual(1, result.exit_code)
+            self.assertIn('The snapshot is of', result.output)
+
     def test_disk_usage(self):
         try:
             runner = CliRunner()
@@ -0,0 +1,65 @@
+# add path to the main package and test columns.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import unittest
+
+from vizexdf.columns import EntryColumns
+
+
+class TestEntryColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = EntryColumns()
+        self.columns.append('folder1', 1927317893, 333, '-')
+        self.columns.append('file1', 3419273173817333, 9081231, 'text/plain')
+        self.columns.append('x-file', 34192773817333, 445522, 'x-files')
+        self.columns.append('file2', 1238193123, 22, 'text/plain')
+
+    def names(self, by, desc=False):
+        return [self.columns.row(i)[0] for i in self.columns.order(by, desc)]
+
+    def test_types_are_stored_once(self):
+        self.assertEqual(4, len(self.columns))
+        self.assertListEqual(['-', 'text/plain', 'x-files'], self.columns.types)
+
+    def test_order_unsorted(self):
+        self.assertListEqual(['folder1', 'file1', 'x-file', 'file2'],
+                             self.names(None, True))
+
+    def test_order_by_each_column(self):
+        self.assertListEqual(['file1', 'file2', 'folder1', 'x-file'],
+                             self.names('name'))
+        self.assertListEqual(['file1', 'x-file', 'folder1', 'file2'],
+                             self.names('dt', True))
+        self.assertListEqual(['file2', 'folder1', 'x-file', 'file1'],
+                             self.names('size'))
+        self.assertListEqual(['folder1', 'file1', 'file2', 'x-file'],
+                             self.names('type'))
+
+    def test_order_first_count(self):
+        first = self.columns.order('size', True, count=2)
+        self.assertListEqual(['file1', 'x-file'],
+                             [self.columns.row(i)[0] for i in first])
+        first = self.columns.order('name', False, count=3)
+        self.assertEqual(3, len(first))
+        self.assertListEqual(['folder1'],
+                             [self.columns.row(i)[0] for i in
+                              self.columns.order(None, count=1)])
+
+    def test_row_with_estimated_size(self):
+        self.columns.set_size(0, 1000, error=50)
+        self.assertTupleEqual(('folder1', 1927317893, 1000, '-', 50, False),
+                              self.columns.row(0))
+        self.assertIsNone(self.columns.row(1)[4])
+
+    def test_row_with_partial_size(self):
+        self.columns.set_size(0, 300, partial=True)
+        self.assertTupleEqual(('folder1', 1927317893, 300, '-', None, True),
+                              self.columns.row(0))
+        self.assertFalse(self.columns.row(1)[5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# add path to the main package and test devices.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import os
+import tempfile
+import unittest
+
+from vizexdf.devices import DeviceMap, read_mounts
+
+
+MOUNTINFO = '''\
+22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw
+23 22 259:2 / /home rw,relatime shared:2 - ext4 /dev/nvme0n1p2 rw
+24 22 0:40 / /mnt/nas\\040share rw,relatime shared:3 - nfs4 nas:/export rw
+25 22 0:41 / /tmp rw,nosuid shared:4 - tmpfs tmpfs rw
+'''
+
+
+class TestDeviceMap(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+        self.mountinfo = os.path.join(self.tmpd.name, 'mountinfo')
+        with open(self.mountinfo, 'w') as f:
+            f.write(MOUNTINFO)
+        # /sys/dev/block links partitions into the directory of their disk
+        self.sysfs = os.path.join(self.tmpd.name, 'dev', 'block')
+        os.makedirs(self.sysfs)
+        for disk, partition, node, rotational in (('sda', 'sda1', '8:1', 1),
+                                                  ('nvme0n1', 'nvme0n1p2',
+                                                   '259:2', 0)):
+            queue = os.path.join(self.tmpd.name, 'block', disk, 'queue')
+            os.makedirs(queue)
+            os.mkdir(os.path.join(self.tmpd.name, 'block', disk, partition))
+            with open(os.path.join(queue, 'rotational'), 'w') as f:
+                f.write(f'{rotational}\n')
+            os.symlink(os.path.join(self.tmpd.name, 'block', disk, partition),
+                       os.path.join(self.sysfs, node))
+        self.devices = DeviceMap({'network': 4}, self.mountinfo, self.sysfs)
+
+    def tearDown(self):
+        self.tmpd.cleanup()
+
+    def test_read_mounts(self):
+        mounts = read_mounts(self.mountinfo)
+        self.assertEqual(4, len(mounts))
+        self.assertEqual('/mnt/nas share', mounts[2].mount_point)
+        self.assertEqual('nfs4', mounts[2].fstype)
+        self.assertEqual(os.makedev(259, 2), mounts[1].device)
+
+    def test_read_mounts_missing(self):
+        self.assertListEqual([], read_mounts(self.mountinfo + '.missing'))
+
+    def test_device_of(self):
+        root = os.makedev(8, 1)
+        self.assertEqual(os.makedev(259, 2),
+                         self.devices.device_of('/home', root))
+        self.assertEqual(root, self.devices.device_of('/usr', root))
+
+    def test_device_of_relative_path(self):
+        root = os.makedev(8, 1)
+        cwd = os.getcwd()
+        os.chdir('/')
+        try:
+            self.assertEqual(os.makedev(259, 2),
+                             self.devices.device_of('./home', root))
+            self.assertEqual(os.makedev(259, 2),
+                             self.devices.device_of('home', root))
+        finally:
+            os.chdir(cwd)
+
+    def test_classify(self):
+        self.assertEqual('rotational',
+                         self.devices.classify(os.makedev(8, 1)))
+        self.assertEqual('ssd', self.devices.classify(os.makedev(259, 2)))
+        self.assertEqual('network', self.devices.classify(os.makedev(0, 40)))
+        self.assertEqual('ssd', self.devices.classify(os.makedev(0, 41)))
+
+    def test_limit(self):
+        self.assertEqual(2, self.devices.limit(os.makedev(8, 1)))
+        self.assertEqual(4, self.devices.limit(os.makedev(0, 40)))
+        self.assertEqual(32, self.devices.limit(os.makedev(0, 41)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,12 +3,19 @@ if __name__ == '__main__':
     from __access import ADD_PATH
     ADD_PATH()
 
+import io
+import time
+import asyncio
+import threading
 import unittest
+import unittest.mock
 import tempfile
 import os
 import warnings
 
-from vizexdf.files import DirectoryFiles
+from vizexdf.files import DirectoryFiles, ANSI_ESCAPE
+from vizexdf.cache import SizeCache
+from vizexdf.scanner import TreeScanner
 
 
 class TestDirectoryFiles(unittest.TestCase):
@@ -34,6 +41,45 @@ class TestDirectoryFiles(unittest.TestCase):
         except Exception as e:
             self.fail(f'Exception occured when trying to get_usage for tmp files {e}')
 
+    def test_get_usage_keeps_listing_order(self):
+        for i in range(20):
+            os.mkdir(os.path.join(self.tmpd.name, f'TEST_{i}'))
+        df = DirectoryFiles(path=self.tmpd.name, workers=2)
+        usage = df.get_usage()
+        self.assertEqual(20, len(usage),
+                         msg='All entries should be collected with few workers')
+        listing = [e.name for e in os.scandir(self.tmpd.name)]
+        for name, row in zip(listing, usage):
+            self.assertTrue(name + '/' in row[0])
+
+    @unittest.mock.patch('sys.stderr', new_callable=io.StringIO)
+    def test_gather_keeps_rows_on_interrupt(self, mock_stderr):
+        for i in range(5):
+            os.mkdir(os.path.join(self.tmpd.name, f'TEST_{i}'))
+        seen = []
+
+        def interrupt_on_third(row):
+            seen.append(row)
+            if len(seen) == 3:
+                raise KeyboardInterrupt
+        rows = DirectoryFiles(path=self.tmpd.name)._gather(interrupt_on_third)
+        self.assertEqual(3, len(rows))
+        self.assertTrue('Interrupted' in mock_stderr.getvalue())
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_print_streaming_data(self, mock_stdout):
+        for i in range(3):
+            os.mkdir(os.path.join(self.tmpd.name, f'TEST_{i}'))
+        DirectoryFiles(path=self.tmpd.name).print_streaming_data()
+        lines = mock_stdout.getvalue().splitlines()
+        self.assertEqual(5, len(lines))
+        self.assertTrue(lines[0].startswith('name'))
+        # every row lines up with the header no matter the colors
+        column = lines[0].index('size')
+        for line in lines[2:]:
+            visible = ANSI_ESCAPE.sub('', line)
+            self.assertEqual('0.0 B', visible[column:column + 5])
+
     def test_get_usage_files_empty_dir(self):
         try:
             df = DirectoryFiles(path=self.tmpd.name)
@@ -77,6 +123,230 @@ class TestDirectoryFiles(unittest.TestCase):
         size = DirectoryFiles().get_dir_size(self.tmpd.name)
         self.assertEqual(0, size)
 
+    def test_get_largest(self):
+        nested = os.path.join(self.tmpd.name, 'a', 'b')
+        hidden = os.path.join(self.tmpd.name, '.hidden')
+        os.makedirs(nested)
+        os.mkdir(hidden)
+        for folder, name, size in ((self.tmpd.name, 'small', 10),
+                                   (nested, 'big', 300),
+                                   (nested, 'medium', 200),
+                                   (hidden, 'huge', 1000)):
+            with open(os.path.join(folder, name), 'wb') as f:
+                f.write(b'0' * size)
+        dirs, files = DirectoryFiles(path=self.tmpd.name).get_largest(2)
+        self.assertListEqual([(500, 'a'), (500, os.path.join('a', 'b'))], dirs)
+        self.assertListEqual([(300, os.path.join('a', 'b', 'big')),
+                              (200, os.path.join('a', 'b', 'medium'))], files)
+
+        dirs, files = DirectoryFiles(path=self.tmpd.name,
+                                     show_hidden=True).get_largest(1)
+        self.assertListEqual([(1000, '.hidden')], dirs)
+        self.assertListEqual([(1000, os.path.join('.hidden', 'huge'))], files)
+
+    def test_get_rollup(self):
+        for folder, size in (('a', 10), ('a/b', 20), ('a/b/c', 30),
+                             ('d', 100), ('.hidden', 1000)):
+            os.mkdir(os.path.join(self.tmpd.name, folder))
+            with open(os.path.join(self.tmpd.name, folder, 'f'), 'wb') as f:
+                f.write(b'0' * size)
+        df = DirectoryFiles(path=self.tmpd.name, sort_by='size', desc=True)
+        self.assertListEqual([(0, self.tmpd.name, 1160), (1, 'd', 100),
+                              (1, 'a', 60), (2, 'b', 50)], df.get_rollup(2))
+        df = DirectoryFiles(path=self.tmpd.name, sort_by='name',
+                            show_hidden=True)
+        self.assertListEqual(['.hidden', 'a', 'd'],
+                             [name for level, name, _ in df.get_rollup(1)
+                              if level == 1])
+        self.assertListEqual([(0, self.tmpd.name, 1160)], df.get_rollup(0))
+        df = DirectoryFiles(path=os.path.join(self.tmpd.name, ''),
+                            sort_by='name')
+        self.assertListEqual([(0, self.tmpd.name, 1160), (1, 'a', 60),
+                              (2, 'b', 50), (1, 'd', 100)], df.get_rollup(2))
+
+    def test_ignore(self):
+        for folder in ('src', 'node_modules'):
+            os.mkdir(os.path.join(self.tmpd.name, folder))
+            with open(os.path.join(self.tmpd.name, folder, 'f'), 'wb') as f:
+                f.write(b'0' * 100)
+        with open(os.path.join(self.tmpd.name, '.vizexignore'), 'w') as f:
+            f.write('node_modules/\n')
+        df = DirectoryFiles(path=self.tmpd.name, show_hidden=True,
+                            ignore=True)
+        self.assertListEqual(['» .vizexignore', '■ src/'],
+                             sorted(row[0] for row in df.get_usage()))
+        self.assertEqual(100 + len('node_modules/\n'),
+                         df.get_rollup(0)[0][2])
+
+    def test_get_growth(self):
+        for folder in ('a', '.hidden'):
+            os.mkdir(os.path.join(self.tmpd.name, folder))
+        df = DirectoryFiles(path=self.tmpd.name)
+        old = df.take_snapshot()
+        for folder, size in (('a', 100), ('.hidden', 500)):
+            with open(os.path.join(self.tmpd.name, folder, 'f'), 'wb') as f:
+                f.write(b'0' * size)
+        current = df.take_snapshot()
+        self.assertListEqual([('.', 0, 600), ('a', 0, 100)],
+                             df.get_growth(old, current))
+        df = DirectoryFiles(path=self.tmpd.name, show_hidden=True)
+        self.assertListEqual([('.', 0, 600), ('.hidden', 0, 500),
+                              ('a', 0, 100)], df.get_growth(old, current))
+        other = DirectoryFiles(path=os.path.join(self.tmpd.name, 'a'))
+        self.assertRaises(ValueError, other.get_growth, old, current)
+        self.assertRaises(ValueError, df.get_growth, old,
+                          other.take_snapshot())
+
+    def test_timeout_gives_partial_records(self):
+        for name in ('stuck', 'fine'):
+            os.mkdir(os.path.join(self.tmpd.name, name))
+        release = threading.Event()
+        original = TreeScanner.estimate_size
+
+        def estimate_size(scanner, path):
+            if path.endswith('stuck'):
+                scanner.progress.size += 42
+                release.wait(10)
+            return original(scanner, path)
+
+        df = DirectoryFiles(path=self.tmpd.name, timeout=0.2)
+        try:
+            with unittest.mock.patch.object(
+                    TreeScanner, 'estimate_size', estimate_size), \
+                    unittest.mock.patch('sys.stderr', new_callable=io.StringIO):
+                start = time.monotonic()
+                records = {record.name: record for record in df._gather()}
+                self.assertLess(time.monotonic() - start, 5)
+                columns = df.get_columns()
+        finally:
+            release.set()
+        self.assertFalse(records['fine'].partial)
+        self.assertTrue(records['stuck'].partial)
+        self.assertEqual(42, records['stuck'].size)
+        rows = {row[0]: row for row in map(columns.row, range(len(columns)))}
+        self.assertTupleEqual((42, True), rows['stuck'][2::3])
+        self.assertFalse(rows['fine'][5])
+
+    def test_timeout_with_stalled_entries_on_one_device(self):
+        for name in ('stuck1', 'stuck2', 'fine'):
+            os.mkdir(os.path.join(self.tmpd.name, name))
+        release = threading.Event()
+        original = TreeScanner.estimate_size
+
+        def estimate_size(scanner, path):
+            if 'stuck' in os.path.basename(path):
+                release.wait(10)
+            return original(scanner, path)
+
+        # one walk at a time on whatever device the tree is on
+        df = DirectoryFiles(path=self.tmpd.name, timeout=0.2,
+                            device_limits=dict.fromkeys(
+                                ('rotational', 'ssd', 'network'), 1))
+        try:
+            with unittest.mock.patch.object(
+                    TreeScanner, 'estimate_size', estimate_size):
+                start = time.monotonic()
+                records = {record.name: record for record in df._gather()}
+                self.assertLess(time.monotonic() - start, 5)
+                start = time.monotonic()
+                columns = df.get_columns()
+                self.assertLess(time.monotonic() - start, 5)
+        finally:
+            release.set()
+        self.assertTrue(records['stuck1'].partial)
+        self.assertTrue(records['stuck2'].partial)
+        self.assertFalse(records['fine'].partial)
+        rows = {row[0]: row for row in map(columns.row, range(len(columns)))}
+        self.assertListEqual([True, True, False],
+                             [rows[name][5] for name in
+                              ('stuck1', 'stuck2', 'fine')])
+
+    def test_page(self):
+        rows = list(range(10))
+        self.assertListEqual(rows, DirectoryFiles()._page(rows))
+        self.assertListEqual([3, 4], DirectoryFiles(limit=2, offset=3)._page(rows))
+        self.assertListEqual([8, 9], DirectoryFiles(offset=8)._page(rows))
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_print_head_data(self, mock_stdout):
+        for i in range(5):
+            with open(os.path.join(self.tmpd.name, f'TEST_{i}'), 'wb') as f:
+                f.write(b'0' * i)
+        df = DirectoryFiles(path=self.tmpd.name, sort_by='size', desc=True,
+                            limit=2, offset=1, type_mode='none')
+        df.print_head_data()
+        lines = mock_stdout.getvalue().splitlines()
+        self.assertEqual(6, len(lines), msg='Header, borders and 2 rows')
+        self.assertTrue('TEST_3' in lines[3])
+        self.assertTrue('TEST_2' in lines[4])
+
+    def test_aiter_records(self):
+        for i in range(5):
+            os.mkdir(os.path.join(self.tmpd.name, f'TEST_{i}'))
+        with open(os.path.join(self.tmpd.name, 'TEST_file'), 'wb') as f:
+            f.write(b'0' * 10)
+
+        async def collect():
+            df = DirectoryFiles(path=self.tmpd.name, type_mode='none')
+            return [record async for record in df.aiter_records(2)]
+        records = asyncio.run(collect())
+        self.assertEqual(6, len(records))
+        self.assertEqual(10, sum(record.size for record in records))
+
+    def test_aiter_records_cancel(self):
+        # wide trees, so walking all of them takes a while
+        for i in range(4):
+            for j in range(300):
+                os.makedirs(os.path.join(self.tmpd.name, f'TEST_{i}', str(j)))
+
+        async def scan_and_cancel():
+            df = DirectoryFiles(path=self.tmpd.name)
+            task = asyncio.ensure_future(self._consume(df))
+            await asyncio.sleep(0)
+            started = time.monotonic()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return time.monotonic() - started
+        self.assertLess(asyncio.run(scan_and_cancel()), 0.5)
+
+    def test_aiter_records_cancel_before_cache_closes(self):
+        for i in range(4):
+            for j in range(300):
+                os.makedirs(os.path.join(self.tmpd.name, f'TEST_{i}', str(j)))
+        cancels = []
+        cancelled_on_close = []
+
+        def recording_scanner(**kwargs):
+            cancels.append(kwargs['cancel'])
+            return TreeScanner(**kwargs)
+
+        class RecordingCache(SizeCache):
+            def close(self):
+                cancelled_on_close.append(cancels[0].is_set())
+                super().close()
+
+        async def scan_and_cancel():
+            df = DirectoryFiles(path=self.tmpd.name, use_cache=True)
+            task = asyncio.ensure_future(self._consume(df))
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        with unittest.mock.patch.dict(
+                os.environ, {'XDG_CACHE_HOME': self.tmpd.name}), \
+                unittest.mock.patch('vizexdf.files.TreeScanner',
+                                    recording_scanner), \
+                unittest.mock.patch('vizexdf.files.SizeCache',
+                                    RecordingCache):
+            asyncio.run(scan_and_cancel())
+        self.assertListEqual([True], cancelled_on_close)
+
+    @staticmethod
+    async def _consume(df):
+        async for _ in df.aiter_records(1):
+            pass
+
     def test_sort_data(self):
         try:
             data = [
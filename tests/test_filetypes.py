@@ -0,0 +1,58 @@
+# add path to the main package and test filetypes.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from vizexdf.filetypes import FileTypeDetector
+
+
+class TestFileTypeDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpd.cleanup()
+
+    def make_file(self, name: str, content: bytes) -> str:
+        path = os.path.join(self.tmpd.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_wrong_mode(self):
+        self.assertRaises(ValueError, FileTypeDetector, 'slow')
+
+    def test_fast_mode_uses_extension(self):
+        path = self.make_file('table.CSV', b'a,b\n1,2\n')
+        detector = FileTypeDetector('fast')
+        with unittest.mock.patch.object(detector, 'sniff') as sniff:
+            self.assertEqual('text/csv', detector.detect(path))
+            sniff.assert_not_called()
+
+    def test_fast_mode_falls_back_to_magic(self):
+        path = self.make_file('script', b'#!/bin/sh\necho hi\n')
+        self.assertEqual('text/x-shellscript',
+                         FileTypeDetector('fast').detect(path))
+
+    def test_magic_mode_ignores_extension(self):
+        path = self.make_file('script.csv', b'#!/bin/sh\necho hi\n')
+        self.assertEqual('text/x-shellscript',
+                         FileTypeDetector('magic').detect(path))
+
+    def test_none_mode(self):
+        path = self.make_file('table.csv', b'a,b\n')
+        self.assertEqual('', FileTypeDetector('none').detect(path))
+
+    def test_unreadable_file(self):
+        missing = os.path.join(self.tmpd.name, 'missing')
+        self.assertEqual('unknown', FileTypeDetector('magic').detect(missing))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# add path to the main package and test highlight.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import unittest
+
+from vizextree.highlight import HighlightRule, NameClassifier, parse_rule
+
+
+class TestNameClassifier(unittest.TestCase):
+
+    def setUp(self):
+        self.classifier = NameClassifier()
+
+    def test_default_rules(self):
+        self.assertTupleEqual(('sky_blue_2', 'bold'),
+                              self.classifier.classify('tests', True))
+        self.assertTupleEqual(('sky_blue_2', 'bold'),
+                              self.classifier.classify('Test-Data'))
+        self.assertTupleEqual(('chartreuse_2b', 'bold'),
+                              self.classifier.classify('src', True))
+        self.assertTupleEqual(('purple_1a', 'dim'),
+                              self.classifier.classify('venv', True))
+        self.assertTupleEqual(('dark_gray', 'dim'),
+                              self.classifier.classify('.git', True))
+        self.assertTupleEqual((None, None),
+                              self.classifier.classify('test_viztree.py'))
+        self.assertTupleEqual((None, None),
+                              self.classifier.classify('readme.md'))
+
+    def test_dirs_only(self):
+        self.assertTupleEqual(('dark_gray', 'dim'),
+                              self.classifier.classify('node_modules', True))
+        self.assertTupleEqual((None, None),
+                              self.classifier.classify('build'))
+
+    def test_first_rule_wins(self):
+        # both rules match, but not at the same position
+        classifier = NameClassifier([HighlightRule('src', 'green'),
+                                     HighlightRule('tests', 'blue')])
+        self.assertTupleEqual(('green', None),
+                              classifier.classify('tests_src'))
+        self.assertTupleEqual(('sky_blue_2', 'bold'),
+                              self.classifier.classify('.tests'))
+
+    def test_no_rules(self):
+        self.assertTupleEqual((None, None),
+                              NameClassifier([]).classify('tests'))
+
+
+class TestParseRule(unittest.TestCase):
+
+    def test_parse_rule(self):
+        self.assertEqual(HighlightRule('dist', 'grey_50', 'dim', True),
+                         parse_rule('dist/=grey_50:dim'))
+        self.assertEqual(HighlightRule(r'\.lock$', 'red', None, False),
+                         parse_rule(r'\.lock$=red'))
+
+    def test_bad_rules(self):
+        for text in ('dist', '=red', 'dist=', '(unclosed=red'):
+            with self.assertRaises(ValueError):
+                parse_rule(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+# add path to the main package and test ignore.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import os
+import tempfile
+import unittest
+
+from ignore import IgnoreMatcher, IgnoreRules, parse_pattern
+
+
+class TestIgnoreRules(unittest.TestCase):
+
+    def test_parse_pattern(self):
+        self.assertIsNone(parse_pattern('# comment\n'))
+        self.assertIsNone(parse_pattern('   \n'))
+        pattern = parse_pattern('!build/\n')
+        self.assertTrue(pattern.negate)
+        self.assertTrue(pattern.dir_only)
+        self.assertFalse(parse_pattern('\\!important').negate)
+
+    def test_names_match_at_any_depth(self):
+        rules = IgnoreRules(['*.pyc', 'node_modules/'])
+        self.assertTrue(rules.match('a.pyc', False))
+        self.assertTrue(rules.match('pkg/sub/a.pyc', False))
+        self.assertTrue(rules.match('web/node_modules', True))
+        # directories only
+        self.assertIsNone(rules.match('web/node_modules', False))
+        self.assertIsNone(rules.match('a.py', False))
+
+    def test_anchored_patterns(self):
+        rules = IgnoreRules(['/build', 'docs/*.html', 'a/**/z', 'logs/**'])
+        self.assertTrue(rules.match('build', True))
+        self.assertIsNone(rules.match('src/build', True))
+        self.assertTrue(rules.match('docs/index.html', False))
+        self.assertIsNone(rules.match('docs/api/index.html', False))
+        self.assertTrue(rules.match('a/z', True))
+        self.assertTrue(rules.match('a/b/c/z', True))
+        self.assertTrue(rules.match('logs/today.log', False))
+        self.assertIsNone(rules.match('logs', True))
+
+    def test_last_pattern_wins(self):
+        rules = IgnoreRules(['*.log', '!keep.log', 'keep.log?', '[ab].txt'])
+        self.assertTrue(rules.match('debug.log', False))
+        self.assertFalse(rules.match('keep.log', False))
+        self.assertTrue(rules.match('keep.logs', False))
+        self.assertTrue(rules.match('b.txt', False))
+        self.assertIsNone(rules.match('c.txt', False))
+
+
+class TestIgnoreMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+        self.root = self.tmpd.name
+        os.makedirs(os.path.join(self.root, 'pkg', 'dist'))
+        with open(os.path.join(self.root, '.gitignore'), 'w') as f:
+            f.write('*.log\ndist/\n')
+        with open(os.path.join(self.root, 'pkg', '.gitignore'), 'w') as f:
+            f.write('!keep.log\n')
+        with open(os.path.join(self.root, '.vizexignore'), 'w') as f:
+            f.write('/pkg/secret\n')
+
+    def tearDown(self):
+        self.tmpd.cleanup()
+
+    def test_ignored(self):
+        matcher = IgnoreMatcher(self.root)
+        pkg = os.path.join(self.root, 'pkg')
+        self.assertTrue(matcher.ignored(self.root, '.git', True))
+        self.assertTrue(matcher.ignored(self.root, 'debug.log', False))
+        self.assertTrue(matcher.ignored(pkg, 'dist', True))
+        self.assertTrue(matcher.ignored(pkg, 'secret', False))
+        self.assertFalse(matcher.ignored(self.root, 'secret', False))
+        self.assertFalse(matcher.ignored(self.root, 'pkg', True))
+
+    def test_deeper_files_take_precedence(self):
+        matcher = IgnoreMatcher(self.root)
+        pkg = os.path.join(self.root, 'pkg')
+        self.assertTrue(matcher.ignored(self.root, 'keep.log', False))
+        self.assertFalse(matcher.ignored(pkg, 'keep.log', False))
+        self.assertTrue(matcher.ignored(os.path.join(pkg, 'dist'),
+                                        'debug.log', False))
+
+    def test_without_defaults(self):
+        matcher = IgnoreMatcher(self.root, patterns=(), files=())
+        self.assertFalse(matcher.ignored(self.root, '.git', True))
+        self.assertFalse(matcher.ignored(self.root, 'debug.log', False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# add path to the main package and test output.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import io
+import json
+import unittest
+
+from vizexdf.output import EntryRecord, CsvWriter, NdjsonWriter
+
+
+class TestWriters(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [
+            EntryRecord('folder, with comma', 1650461093.75, 80612, '-', 12),
+            EntryRecord('file.txt', 1650461000.0, 325, 'text/plain'),
+            EntryRecord('mnt', 0.0, 4096, '-', partial=True),
+        ]
+
+    def test_csv_writer(self):
+        stream = io.StringIO()
+        writer = CsvWriter(stream)
+        for record in self.records:
+            writer.write(record)
+        self.assertListEqual([
+            'name,type,size,mtime,error,partial',
+            '"folder, with comma",-,80612,1650461093,12,0',
+            'file.txt,text/plain,325,1650461000,,0',
+            'mnt,-,4096,0,,1',
+        ], stream.getvalue().splitlines())
+
+    def test_ndjson_writer(self):
+        stream = io.StringIO()
+        writer = NdjsonWriter(stream)
+        for record in self.records:
+            writer.write(record)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(3, len(lines))
+        self.assertDictEqual({'name': 'file.txt', 'type': 'text/plain',
+                              'size': 325, 'mtime': 1650461000,
+                              'error': None, 'partial': False}, lines[1])
+        self.assertEqual(12, lines[0]['error'])
+        self.assertTrue(lines[2]['partial'])
+
+
+if __name__ == '__main__':
+    unittest.main()
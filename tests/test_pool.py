@@ -0,0 +1,122 @@
+# add path to the main package and test pool.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import threading
+import unittest
+import concurrent.futures
+
+from vizexdf.pool import DaemonThreadPool
+
+
+class TestDaemonThreadPool(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.pool = DaemonThreadPool(1)
+
+    def tearDown(self):
+        self.release.set()
+        self.pool.shutdown(wait=False)
+
+    def test_submit(self):
+        futures = [self.pool.submit(pow, 2, i) for i in range(5)]
+        self.assertListEqual([1, 2, 4, 8, 16],
+                             [future.result(5) for future in futures])
+
+    def test_exception(self):
+        future = self.pool.submit(int, 'not a number')
+        with self.assertRaises(ValueError):
+            future.result(5)
+
+    def test_workers_are_daemons(self):
+        future = self.pool.submit(threading.current_thread)
+        self.assertTrue(future.result(5).daemon)
+
+    def test_abandon_replaces_worker(self):
+        started = threading.Event()
+
+        def hang():
+            started.set()
+            self.release.wait()
+
+        stuck = self.pool.submit(hang)
+        self.assertTrue(started.wait(5))
+        self.assertIsNotNone(self.pool.started(stuck))
+        queued = self.pool.submit(sum, (1, 2))
+        self.assertIsNone(self.pool.started(queued))
+        self.assertTrue(self.pool.abandon(stuck))
+        # the queued task runs while the first one still hangs
+        self.assertEqual(3, queued.result(5))
+        self.assertFalse(stuck.done())
+        self.assertFalse(self.pool.abandon(queued))
+
+    def test_exit_cancels_queued(self):
+        started = threading.Event()
+
+        def hang():
+            started.set()
+            self.release.wait()
+
+        with self.pool:
+            self.pool.submit(hang)
+            self.assertTrue(started.wait(5))
+            queued = self.pool.submit(sum, (1, 2))
+        self.assertTrue(queued.cancelled())
+        with self.assertRaises(RuntimeError):
+            self.pool.submit(sum, (1, 2))
+
+    def test_limit_per_key(self):
+        pool = DaemonThreadPool(4, limit_for={'slow': 1, 'fast': 3}.get)
+        started = threading.Event()
+        running = []
+
+        def hang(key):
+            running.append(key)
+            started.set()
+            self.release.wait()
+
+        try:
+            slow = [pool.submit_to('slow', hang, 'slow') for _ in range(3)]
+            fast = [pool.submit_to('fast', abs, -i) for i in range(5)]
+            self.assertTrue(started.wait(5))
+            # the slow key is at its limit, the fast one isn't held up
+            self.assertListEqual([0, 1, 2, 3, 4],
+                                 [future.result(5) for future in fast])
+            self.assertListEqual(['slow'], running)
+            self.assertFalse(any(future.done() for future in slow))
+            self.release.set()
+            concurrent.futures.wait(slow, 5)
+            self.assertListEqual(['slow'] * 3, running)
+        finally:
+            pool.shutdown(wait=False)
+
+    def test_abandon_frees_key(self):
+        pool = DaemonThreadPool(4, limit_for={'slow': 1}.get)
+        started = threading.Event()
+
+        def hang():
+            started.set()
+            self.release.wait()
+
+        try:
+            stuck = pool.submit_to('slow', hang)
+            queued = pool.submit_to('slow', abs, -1)
+            self.assertTrue(started.wait(5))
+            self.assertIsNone(pool.started(queued))
+            self.assertTrue(pool.abandon(stuck))
+            # the queued task gets the slot while the first one hangs
+            self.assertEqual(1, queued.result(5))
+            self.assertFalse(stuck.done())
+        finally:
+            pool.shutdown(wait=False)
+
+    def test_works_with_wait(self):
+        futures = [self.pool.submit(abs, -i) for i in range(3)]
+        done, _ = concurrent.futures.wait(futures, 5)
+        self.assertEqual(3, len(done))
+
+
+if __name__ == '__main__':
+    unittest.main()
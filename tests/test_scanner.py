@@ -0,0 +1,113 @@
+# add path to the main package and test scanner.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import os
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+from ignore import IgnoreMatcher
+from vizexdf.scanner import TreeScanner, ScanCancelled
+
+
+class TestTreeScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+        # root/a/b with files of known size on every level
+        self.a = os.path.join(self.tmpd.name, 'a')
+        self.b = os.path.join(self.a, 'b')
+        os.makedirs(self.b)
+        for folder, size in ((self.tmpd.name, 10), (self.a, 20), (self.b, 30)):
+            with open(os.path.join(folder, 'file'), 'wb') as f:
+                f.write(b'0' * size)
+
+    def tearDown(self):
+        self.tmpd.cleanup()
+
+    def test_dir_sizes_are_cumulative(self):
+        sizes = TreeScanner().dir_sizes(self.tmpd.name)
+        self.assertEqual(60, sizes[self.tmpd.name])
+        self.assertEqual(50, sizes[self.a])
+        self.assertEqual(30, sizes[self.b])
+
+    def test_walk_is_post_order(self):
+        paths = [e.path for e in TreeScanner().walk(self.tmpd.name)]
+        self.assertListEqual([self.b, self.a, self.tmpd.name], paths)
+
+    def test_walk_with_files(self):
+        entries = list(TreeScanner(with_files=True).walk(self.tmpd.name))
+        files = [e for e in entries if not e.is_dir]
+        self.assertEqual(3, len(files))
+        self.assertEqual(60, sum(e.size for e in files))
+        deepest = [e for e in files if e.path.startswith(self.b)][0]
+        self.assertEqual(3, deepest.depth)
+
+    def test_walk_in_inode_order(self):
+        for i in range(20):
+            with open(os.path.join(self.a, f'f{i}'), 'wb') as f:
+                f.write(b'0' * i)
+        scanner = TreeScanner(with_files=True, inode_order=True)
+        files = [e.path for e in scanner.walk(self.a) if not e.is_dir
+                 and os.path.dirname(e.path) == self.a]
+        inodes = [os.stat(path).st_ino for path in files]
+        self.assertEqual(21, len(files))
+        self.assertListEqual(sorted(inodes), inodes)
+        self.assertEqual(TreeScanner().total_size(self.tmpd.name),
+                         TreeScanner(inode_order=True)
+                         .total_size(self.tmpd.name))
+
+    def test_ignored_dirs_are_not_opened(self):
+        with open(os.path.join(self.tmpd.name, '.gitignore'), 'w') as f:
+            f.write('b/\n')
+        scandir = os.scandir
+        opened = []
+
+        def recording_scandir(path):
+            opened.append(path)
+            return scandir(path)
+
+        scanner = TreeScanner(ignore=IgnoreMatcher(self.tmpd.name))
+        with unittest.mock.patch('os.scandir', recording_scandir):
+            size = scanner.total_size(self.tmpd.name)
+        self.assertEqual(30 + len('b/\n'), size)
+        self.assertNotIn(self.b, opened)
+
+    def test_total_size_skips_symlinked_dirs(self):
+        os.symlink(self.a, os.path.join(self.b, 'loop'))
+        os.symlink('/this/path/does/not/exist',
+                   os.path.join(self.b, 'broken-link'))
+        self.assertEqual(60, TreeScanner().total_size(self.tmpd.name))
+
+    def test_cancelled_walk_stops(self):
+        cancel = threading.Event()
+        cancel.set()
+        scanner = TreeScanner(cancel=cancel)
+        self.assertRaises(ScanCancelled, scanner.total_size, self.tmpd.name)
+
+    def test_estimate_size_within_budget_is_exact(self):
+        estimate = TreeScanner(budget=60).estimate_size(self.tmpd.name)
+        self.assertTrue(estimate.exact)
+        self.assertEqual((60, 0), (estimate.size, estimate.error))
+
+    def test_estimate_size_out_of_budget(self):
+        for i in range(20):
+            folder = os.path.join(self.b, str(i))
+            os.mkdir(folder)
+            with open(os.path.join(folder, 'file'), 'wb') as f:
+                f.write(b'0' * 100)
+        estimate = TreeScanner(budget=0).estimate_size(self.tmpd.name)
+        self.assertFalse(estimate.exact)
+        self.assertTrue(estimate.size > 0)
+        self.assertTrue(estimate.error > 0)
+
+    def test_total_size_missing_dir(self):
+        missing = os.path.join(self.tmpd.name, 'missing')
+        self.assertEqual(0, TreeScanner().total_size(missing))
+
+
+if __name__ == '__main__':
+    unittest.main()
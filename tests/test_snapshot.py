@@ -0,0 +1,91 @@
+# add path to the main package and test snapshot.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import os
+import tempfile
+import unittest
+
+from vizexdf.snapshot import Snapshot, diff
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+        self.root = self.tmpd.name
+        os.makedirs(os.path.join(self.root, 'a', 'b'))
+        os.mkdir(os.path.join(self.root, 'c'))
+        self.write(os.path.join('a', 'b', 'file'), 100)
+        self.write(os.path.join('c', 'file'), 10)
+
+    def tearDown(self):
+        self.tmpd.cleanup()
+
+    def write(self, name, size):
+        with open(os.path.join(self.root, name), 'ab') as f:
+            f.write(b'0' * size)
+
+    def children(self, snapshot, index):
+        return {snapshot.name(child): child
+                for child in snapshot.children(index)}
+
+    def test_from_scan(self):
+        snapshot = Snapshot.from_scan(self.root)
+        self.assertEqual(4, len(snapshot))
+        self.assertEqual(110, snapshot.size(snapshot.root_index))
+        top = self.children(snapshot, snapshot.root_index)
+        self.assertEqual({'a', 'c'}, set(top))
+        self.assertEqual(100, snapshot.size(top['a']))
+        self.assertEqual(['b'], list(self.children(snapshot, top['a'])))
+
+    def test_from_scan_trailing_slash(self):
+        snapshot = Snapshot.from_scan(os.path.join(self.root, ''))
+        self.assertEqual(os.path.abspath(self.root), snapshot.root)
+        top = self.children(snapshot, snapshot.root_index)
+        self.assertEqual({'a', 'c'}, set(top))
+        self.assertEqual(['b'], list(self.children(snapshot, top['a'])))
+
+    def test_save_and_load(self):
+        filename = os.path.join(self.root, 'snap.bin')
+        Snapshot.from_scan(self.root).save(filename)
+        snapshot = Snapshot.load(filename)
+        self.assertEqual(os.path.abspath(self.root), snapshot.root)
+        self.assertEqual(4, len(snapshot))
+        self.assertEqual(110, snapshot.size(snapshot.root_index))
+        top = self.children(snapshot, snapshot.root_index)
+        self.assertEqual(10, snapshot.size(top['c']))
+
+    def test_load_rejects_other_files(self):
+        filename = os.path.join(self.root, 'c', 'file')
+        with self.assertRaises(ValueError):
+            Snapshot.load(filename)
+        empty = os.path.join(self.root, 'empty')
+        open(empty, 'wb').close()
+        with self.assertRaises(ValueError):
+            Snapshot.load(empty)
+
+    def test_diff(self):
+        old = Snapshot.from_scan(self.root)
+        self.write(os.path.join('a', 'b', 'file'), 50)
+        os.mkdir(os.path.join(self.root, 'new'))
+        self.write(os.path.join('new', 'file'), 5)
+        os.remove(os.path.join(self.root, 'c', 'file'))
+        os.rmdir(os.path.join(self.root, 'c'))
+        changes = sorted(diff(old, Snapshot.from_scan(self.root)))
+        self.assertEqual([
+            ('.', 110, 155),
+            ('a', 100, 150),
+            ('a/b', 100, 150),
+            ('c', 10, 0),
+            ('new', 0, 5),
+        ], changes)
+
+    def test_diff_skips_unchanged(self):
+        snapshot = Snapshot.from_scan(self.root)
+        self.assertEqual([], diff(snapshot, Snapshot.from_scan(self.root)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,380 @@
+# add path to the main package and test viztree.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import io
+import os
+import sys
+import time
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+from ignore import IgnoreMatcher
+from vizextree import viztree
+from vizextree.viztree import TreeRenderer, construct_tree
+
+
+class TestTreeRenderer(unittest.TestCase):
+
+    def test_plain_when_not_a_terminal(self):
+        stream = io.StringIO()
+        with TreeRenderer(stream) as renderer:
+            renderer.line('├── ', 'tests', 'sky_blue_2', 'bold')
+        self.assertEqual('├── tests\n', stream.getvalue())
+
+    @unittest.mock.patch.dict(os.environ, {'FORCE_COLOR': '1'})
+    def test_single_span_around_name(self):
+        stream = io.StringIO()
+        with TreeRenderer(stream, color=True) as renderer:
+            renderer.line('│   └── ', 'tests', 'sky_blue_2', 'bold')
+            renderer.line('    ', 'plain')
+        first, second = stream.getvalue().splitlines()
+        self.assertTrue(first.startswith('│   └── \x1b['))
+        self.assertEqual(2, first.count('\x1b[') - 1)  # bold, color, reset
+        self.assertTrue(first.endswith('tests\x1b[0m'))
+        self.assertEqual('    plain', second)
+
+    def test_buffers_writes(self):
+        stream = unittest.mock.Mock(wraps=io.StringIO())
+        stream.isatty.return_value = False
+        with TreeRenderer(stream) as renderer:
+            for i in range(1000):
+                renderer.line('├── ', f'file{i}')
+        self.assertLess(stream.write.call_count, 5)
+
+
+class TestConstructTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.tmpd.name, 'src', 'pkg'))
+        open(os.path.join(self.tmpd.name, 'src', 'main.py'), 'w').close()
+        viztree.FILES_COUNT = viztree.DIRS_COUNT = 0
+
+    def tearDown(self):
+        self.tmpd.cleanup()
+
+    def test_construct_tree(self):
+        stream = io.StringIO()
+        construct_tree(self.tmpd.name, 3, stream=stream)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(self.tmpd.name, lines[0])
+        self.assertEqual('└── src', lines[1])
+        # entries of src come in the order of the listing
+        self.assertListEqual(['    ├── ', '    └── '],
+                             [line[:8] for line in lines[2:4]])
+        self.assertListEqual(['main.py', 'pkg'],
+                             sorted(line[8:] for line in lines[2:4]))
+        self.assertEqual('2 directories, 1 files', lines[-1])
+
+    def test_prefetch_keeps_order(self):
+        for i in range(5):
+            for j in range(3):
+                os.makedirs(os.path.join(self.tmpd.name, f'd{i}', f'e{j}'))
+        outputs = []
+        for width in (0, 4):
+            viztree.FILES_COUNT = viztree.DIRS_COUNT = 0
+            stream = io.StringIO()
+            construct_tree(self.tmpd.name, 3, stream=stream, prefetch=width,
+                           inode_order=True)
+            outputs.append(stream.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_prefetch_lists_ahead(self):
+        # deep enough that the last level is opened without descending
+        for i in range(6):
+            for j in range(6):
+                for k in range(6):
+                    os.makedirs(os.path.join(self.tmpd.name, f'd{i}',
+                                             f'e{j}', f'f{k}'))
+        stream_dir = viztree.stream_dir
+        lock = threading.Lock()
+        calls = []
+
+        def slow_stream_dir(*args):
+            with lock:
+                calls.append(threading.current_thread() is
+                             threading.main_thread())
+            time.sleep(0.01)
+            return stream_dir(*args)
+
+        with unittest.mock.patch.object(viztree, 'stream_dir',
+                                        slow_stream_dir):
+            timings = []
+            for width in (0, 8):
+                calls.clear()
+                start = time.monotonic()
+                construct_tree(self.tmpd.name, 3, stream=io.StringIO(),
+                               prefetch=width)
+                timings.append(time.monotonic() - start)
+        # 45 directories to open (src too), only the root isn't read ahead
+        self.assertEqual(45, len(calls))
+        self.assertEqual(1, sum(calls))
+        self.assertLess(timings[1], timings[0] / 3)
+
+
+class TestGenerateIterable(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpd.cleanup)
+        viztree.FILES_COUNT = viztree.DIRS_COUNT = 0
+
+    def remove_deep(self, path):
+        os.remove(os.path.join(path, 'last'))
+        while path != self.tmpd.name:
+            os.rmdir(path)
+            path = os.path.dirname(path)
+
+    def test_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        # makedirs and rmtree recurse too
+        path = self.tmpd.name
+        for _ in range(depth):
+            path = os.path.join(path, 'd')
+            os.mkdir(path)
+        open(os.path.join(path, 'last'), 'w').close()
+        self.addCleanup(self.remove_deep, path)
+        lines = list(viztree.generate_iterable(self.tmpd.name))
+        self.assertEqual(depth + 1, len(lines))
+        head, name, is_dir = lines[-1]
+        self.assertEqual(('last', False), (name, is_dir))
+        self.assertEqual(viztree.SPACE * depth + viztree.LEAF, head)
+
+    def test_streams_entries(self):
+        for i in range(100):
+            open(os.path.join(self.tmpd.name, f'file{i}'), 'w').close()
+        read = []
+        stream_dir = viztree.stream_dir
+
+        def counting_stream_dir(*args):
+            for entry in stream_dir(*args):
+                read.append(entry)
+                yield entry
+
+        with unittest.mock.patch.object(viztree, 'stream_dir',
+                                        counting_stream_dir):
+            lines = viztree.generate_iterable(self.tmpd.name)
+            head, _, _ = next(lines)
+            self.assertEqual(viztree.TEE, head)
+            self.assertEqual(2, len(read))  # the line and its lookahead
+            *_, (head, _, _) = lines
+            self.assertEqual(viztree.LEAF, head)
+
+    def test_max_children(self):
+        for i in range(10):
+            os.makedirs(os.path.join(self.tmpd.name, f'dir{i}', 'sub'))
+            open(os.path.join(self.tmpd.name, f'file{i}'), 'w').close()
+        lines = list(viztree.generate_iterable(self.tmpd.name,
+                                               max_children=3))
+        top = [line for line in lines if not line[0].startswith(
+            (viztree.BRANCH, viztree.SPACE))]
+        self.assertEqual(4, len(top))
+        self.assertEqual([viztree.TEE] * 3, [line[0] for line in top[:3]])
+        self.assertEqual((viztree.LEAF, None), (top[3][0], top[3][2]))
+        shown = sum(line[2] for line in top[:3])
+        self.assertEqual(f'… and 17 more ({10 - shown} dirs, '
+                         + f'{7 + shown} files)', top[3][1])
+        # subdirectories of the listed directories are still walked
+        self.assertEqual(shown, sum(name == 'sub' for _, name, _ in lines))
+        self.assertEqual((10, 10), (viztree.DIRS_COUNT - shown,
+                                    viztree.FILES_COUNT))
+
+    def test_max_children_reads_ahead_only_shown(self):
+        for i in range(5):
+            for j in range(5):
+                os.makedirs(os.path.join(self.tmpd.name, f'd{i}', f'e{j}'))
+        stream_dir = viztree.stream_dir
+        opened = []
+
+        def recording_stream_dir(path, *args):
+            opened.append(path)
+            return stream_dir(path, *args)
+
+        with unittest.mock.patch.object(viztree, 'stream_dir',
+                                        recording_stream_dir), \
+                viztree.DirectoryPrefetcher(8) as prefetcher:
+            lines = list(viztree.generate_iterable(
+                self.tmpd.name, level=2, prefetcher=prefetcher,
+                max_children=1))
+        shown = lines[0][1]
+        self.assertListEqual(
+            [self.tmpd.name, os.path.join(self.tmpd.name, shown)], opened)
+
+    def test_max_children_reads_ahead_only_listed(self):
+        paths = ['']
+        for _ in range(3):
+            paths = [os.path.join(path, name)
+                     for path in paths for name in ('x', 'y', 'z')]
+            for path in paths:
+                os.makedirs(os.path.join(self.tmpd.name, path))
+                for name in ('f0', 'f1'):
+                    open(os.path.join(self.tmpd.name, path, name),
+                         'w').close()
+        stream_dir = viztree.stream_dir
+        for only_dirs in (False, True):
+            opened = {0: [], 8: []}
+            for width, paths in opened.items():
+
+                def recording_stream_dir(path, *args):
+                    paths.append(path)
+                    return stream_dir(path, *args)
+
+                with unittest.mock.patch.object(viztree, 'stream_dir',
+                                                recording_stream_dir), \
+                        viztree.DirectoryPrefetcher(width) as prefetcher:
+                    list(viztree.generate_iterable(
+                        self.tmpd.name, level=4, only_dirs=only_dirs,
+                        prefetcher=prefetcher, max_children=2))
+            # every directory read ahead is walked, and read only once
+            self.assertListEqual(sorted(opened[0]), sorted(opened[8]))
+
+    def test_prefetch_drops_directories_walked_past(self):
+        for folder in ('a', 'b', 'c'):
+            os.makedirs(os.path.join(self.tmpd.name, folder, 'sub'))
+        stream_dir = viztree.stream_dir
+        opened = []
+
+        def recording_stream_dir(path, *args):
+            opened.append(path)
+            return stream_dir(path, *args)
+
+        with unittest.mock.patch.object(viztree, 'stream_dir',
+                                        recording_stream_dir), \
+                viztree.DirectoryPrefetcher(8) as prefetcher:
+            listing = [path for _, path, _ in
+                       prefetcher.open(self.tmpd.name)]
+            # the walk goes past the first directory without opening it
+            for path in listing[1:]:
+                list(prefetcher.open(path))
+                list(prefetcher.open(os.path.join(path, 'sub')))
+            self.assertFalse(prefetcher._ahead)
+            self.assertFalse(prefetcher._heads)
+        for path in listing[1:]:
+            self.assertEqual(1, opened.count(path))
+
+    def test_max_children_not_reached(self):
+        for i in range(3):
+            open(os.path.join(self.tmpd.name, f'file{i}'), 'w').close()
+        lines = list(viztree.generate_iterable(self.tmpd.name,
+                                               max_children=3))
+        self.assertEqual(3, len(lines))
+        self.assertEqual(viztree.LEAF, lines[-1][0])
+
+    def test_ignore(self):
+        for folder in ('.git/objects', 'build/lib', 'src'):
+            os.makedirs(os.path.join(self.tmpd.name, folder))
+        for file in ('src/a.py', 'src/a.pyc', '.gitignore'):
+            with open(os.path.join(self.tmpd.name, file), 'w') as f:
+                f.write('build/\n*.pyc\n')
+        ignore = IgnoreMatcher(self.tmpd.name)
+        expected = ['.gitignore', 'src', 'a.py']
+        for width in (0, 4):
+            with viztree.DirectoryPrefetcher(width, ignore=ignore) as ahead:
+                lines = viztree.generate_iterable(self.tmpd.name,
+                                                  prefetcher=ahead)
+                self.assertListEqual(expected, sorted(
+                    (name for _, name, _ in lines), key=expected.index))
+        self.assertEqual([(1, 1), (0, 1)], viztree.count_tree(
+            self.tmpd.name, ignore=ignore))
+        self.assertEqual(2 * len('build/\n*.pyc\n'), viztree.size_tree(
+            self.tmpd.name, ignore=ignore).size)
+
+    def test_same_lines_with_prefetch(self):
+        for folder in ('a/b/c', 'a/d', 'e', 'f/g'):
+            os.makedirs(os.path.join(self.tmpd.name, folder))
+        for file in ('a/b/x', 'a/y', 'f/g/z', 'w'):
+            open(os.path.join(self.tmpd.name, file), 'w').close()
+        plain = list(viztree.generate_iterable(self.tmpd.name,
+                                               inode_order=True))
+        for width in (1, 8):
+            with viztree.DirectoryPrefetcher(width, True) as prefetcher:
+                self.assertEqual(plain, list(viztree.generate_iterable(
+                    self.tmpd.name, inode_order=True,
+                    prefetcher=prefetcher)))
+
+
+class TestCountTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpd.cleanup)
+        for folder in ('a/b/c', 'a/d', 'e', 'f/g/h'):
+            os.makedirs(os.path.join(self.tmpd.name, folder))
+        for file in ('a/b/x', 'a/y', 'a/z', 'f/g/z', 'f/g/h/v', 'w'):
+            open(os.path.join(self.tmpd.name, file), 'w').close()
+        viztree.FILES_COUNT = viztree.DIRS_COUNT = 0
+
+    def test_levels(self):
+        self.assertEqual([(3, 1), (3, 2), (2, 2), (0, 1)],
+                         viztree.count_tree(self.tmpd.name))
+        self.assertEqual([(3, 1), (3, 2)],
+                         viztree.count_tree(self.tmpd.name, 2))
+        self.assertEqual([(3, 0), (3, 0), (2, 0)],
+                         viztree.count_tree(self.tmpd.name, only_dirs=True))
+
+    def test_same_as_the_tree(self):
+        for max_children in (None, 1, 2):
+            viztree.FILES_COUNT = viztree.DIRS_COUNT = 0
+            for _ in viztree.generate_iterable(self.tmpd.name,
+                                               max_children=max_children):
+                pass
+            levels = viztree.count_tree(self.tmpd.name,
+                                        max_children=max_children)
+            self.assertEqual((viztree.DIRS_COUNT, viztree.FILES_COUNT),
+                             (sum(count.dirs for count in levels),
+                              sum(count.files for count in levels)))
+
+    def test_totals_past_length_limit(self):
+        stream = io.StringIO()
+        construct_tree(self.tmpd.name, -1, max_length=3, stream=stream)
+        self.assertTrue(stream.getvalue().endswith(
+            '8 directories, 6 files\n'))
+
+    def test_print_counts(self):
+        stream = io.StringIO()
+        viztree.print_counts(self.tmpd.name, 2, stream=stream)
+        self.assertEqual(['level 1: 3 directories, 1 files',
+                          'level 2: 3 directories, 2 files', '',
+                          '6 directories, 3 files'],
+                         stream.getvalue().splitlines()[1:])
+
+
+class TestSizeTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpd.cleanup)
+        os.makedirs(os.path.join(self.tmpd.name, 'big', 'deep', 'deeper'))
+        os.makedirs(os.path.join(self.tmpd.name, 'small'))
+        for file, size in (('big/a', 300), ('big/deep/deeper/b', 500),
+                           ('small/c', 100), ('d', 50)):
+            with open(os.path.join(self.tmpd.name, file), 'wb') as f:
+                f.write(b'0' * size)
+        viztree.FILES_COUNT = viztree.DIRS_COUNT = 0
+
+    def test_sizes_below_shown_levels(self):
+        root = viztree.size_tree(self.tmpd.name, 2)
+        self.assertEqual(950, root.size)
+        big = next(child for child in root.children if child.name == 'big')
+        self.assertEqual(800, big.size)
+        deep = next(child for child in big.children if child.name == 'deep')
+        self.assertEqual((500, None), (deep.size, deep.children))
+
+    def test_generate_sized(self):
+        root = viztree.size_tree(self.tmpd.name, 1)
+        lines = list(viztree.generate_sized(root, max_children=2, width=4))
+        self.assertEqual(['big', 'small', '… and 1 more (0 dirs, 1 files)'],
+                         [name for _, name, _ in lines])
+        self.assertEqual(viztree.TEE + '[  800.0 B  84.2% ███▒░] ',
+                         lines[0][0])
+        self.assertEqual(viztree.LEAF + '[   50.0 B   5.3% ▒░░░░] ',
+                         lines[2][0])
+        self.assertEqual((2, 1), (viztree.DIRS_COUNT, viztree.FILES_COUNT))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# add path to the main package and test watch.py
+if __name__ == '__main__':
+    from __access import ADD_PATH
+    ADD_PATH()
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from vizexdf.watch import Inotify, LiveTree
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), 'inotify is Linux only')
+class TestLiveTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpd = tempfile.TemporaryDirectory()
+        self.sub = os.path.join(self.tmpd.name, 'sub')
+        os.mkdir(self.sub)
+        self.write(os.path.join(self.sub, 'file'), 100)
+        self.inotify = Inotify()
+        self.tree = LiveTree(self.tmpd.name, self.inotify)
+
+    def tearDown(self):
+        self.inotify.close()
+        self.tmpd.cleanup()
+
+    @staticmethod
+    def write(path, size, mode='wb'):
+        with open(path, mode) as f:
+            f.write(b'0' * size)
+
+    def settle(self):
+        while self.tree.update(0.05):
+            pass
+
+    def test_initial_scan(self):
+        self.assertEqual(100, self.tree.size(self.tmpd.name))
+        self.assertEqual(100, self.tree.size(self.sub))
+
+    def test_file_changes_reach_ancestors(self):
+        self.write(os.path.join(self.sub, 'file'), 50, mode='ab')
+        self.write(os.path.join(self.tmpd.name, 'top'), 7)
+        self.settle()
+        self.assertEqual(150, self.tree.size(self.sub))
+        self.assertEqual(157, self.tree.size(self.tmpd.name))
+
+    def test_new_and_removed_directories(self):
+        nested = os.path.join(self.sub, 'new', 'nested')
+        os.makedirs(nested)
+        self.settle()
+        self.write(os.path.join(nested, 'file'), 20)
+        self.settle()
+        self.assertEqual(120, self.tree.size(self.tmpd.name))
+        shutil.rmtree(self.sub)
+        self.settle()
+        self.assertEqual(0, self.tree.size(self.tmpd.name))
+        self.assertEqual(0, self.tree.size(nested))
+
+    def test_moved_directories(self):
+        moved = os.path.join(self.tmpd.name, 'moved')
+        os.rename(self.sub, moved)
+        self.settle()
+        self.assertEqual(100, self.tree.size(moved))
+        self.assertEqual(0, self.tree.size(self.sub))
+        self.assertEqual(100, self.tree.size(self.tmpd.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,15 +4,26 @@ import click
 import sys
 
 from tools import append_to_bash
+from ignore import IgnoreMatcher
 from vizexdu.disks import DiskUsage
 from vizexdu.battery import Battery
 from vizexdu.charts import Options
 from vizexdu.cpu import CPUFreq
 from vizexdf.files import DirectoryFiles
-from vizextree.viztree import construct_tree
+from vizexdf.devices import DEVICE_CLASSES
+from vizextree.viztree import construct_tree, print_counts, PREFETCH_WIDTH
+from vizextree.highlight import NameClassifier, DEFAULT_RULES, parse_rule
 
 
 # ----- vizextree options and arguments -----
+def parse_rules(ctx, param, values) -> tuple:
+    """Turns PATTERN=COLOR[:STYLE] values of --rule into rules"""
+    try:
+        return tuple(parse_rule(value) for value in values)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
 @click.version_option('2.1.1', message='%(prog)s version %(version)s')
 @click.command(options_metavar='[options]')
 @click.argument(
@@ -27,7 +38,58 @@ from vizextree.viztree import construct_tree
     default=3,
     help="How many levels of Directory Tree to be printed (By Default it's 3)"
 )
-def print_tree(path: str, level: int) -> None:
+@click.option(
+    '--inode-order',
+    is_flag=True,
+    help='List the entries of every directory in the order of their inode '
+    + 'numbers, which cuts down seeking on spinning disks'
+)
+@click.option(
+    '-r', '--rule', 'rules',
+    multiple=True,
+    callback=parse_rules,
+    metavar='PATTERN=COLOR[:STYLE]',
+    help='Highlight names matching the regular expression PATTERN, before '
+    + 'the default rules. A PATTERN ending with / only applies to '
+    + "directories, e.g. -r 'dist/=grey_50:dim'"
+)
+@click.option(
+    '-p', '--prefetch',
+    type=click.IntRange(min=0),
+    default=PREFETCH_WIDTH,
+    metavar='N',
+    help='How many directories are listed ahead of the tree at once, '
+    + f'helps on network storage (By Default it\'s {PREFETCH_WIDTH}, '
+    + '0 turns it off)'
+)
+@click.option(
+    '-k', '--max-children',
+    type=click.IntRange(min=1),
+    metavar='K',
+    help='List only the first K entries of every directory and count the '
+    + 'rest, keeps huge directories from taking over the tree'
+)
+@click.option(
+    '--count',
+    is_flag=True,
+    help="Don't print the tree, only count the directories and files on "
+    + 'every level of it'
+)
+@click.option(
+    '--sizes',
+    is_flag=True,
+    help='Show the cumulative size of every entry, its share of the parent '
+    + 'directory and a bar of it, biggest entries first'
+)
+@click.option(
+    '--ignore',
+    is_flag=True,
+    help='Leave out what .gitignore and .vizexignore files in the tree '
+    + 'ignore, and .git, without ever opening the ignored directories'
+)
+def print_tree(path: str, level: int, inode_order: bool, rules: tuple,
+               prefetch: int, max_children: int, count: bool,
+               sizes: bool, ignore: bool) -> None:
     """
 \b
 
@@ -48,10 +110,33 @@ __   _(_)_________  _| |_ _ __ ___  ___
 
     This'll print a directory tree of current working directory for two levels
     """
-    construct_tree(path, level)
+    matcher = IgnoreMatcher(path) if ignore else None
+    if count:
+        print_counts(path, level, inode_order=inode_order,
+                     max_children=max_children, workers=prefetch,
+                     ignore=matcher)
+        return
+    construct_tree(path, level, inode_order=inode_order,
+                   classifier=NameClassifier(rules + DEFAULT_RULES),
+                   prefetch=prefetch, max_children=max_children,
+                   sizes=sizes, ignore=matcher)
 
 
 # ----- vizexdf options and arguments -----
+def parse_io_limits(ctx, param, values) -> dict:
+    """Turns CLASS=N pairs of --io-limit into a dict"""
+    limits = {}
+    for value in values:
+        kind, _, limit = value.partition('=')
+        if kind not in DEVICE_CLASSES or not limit.isdigit() \
+                or not int(limit):
+            raise click.BadParameter(
+                f"'{value}' should be CLASS=N with a positive N and one of "
+                + f"the classes {', '.join(DEVICE_CLASSES)}")
+        limits[kind] = int(limit)
+    return limits
+
+
 @click.version_option('2.1.1', message='%(prog)s version %(version)s')
 @click.command(options_metavar='[options]')
 @click.argument(
@@ -75,6 +160,148 @@ __   _(_)_________  _| |_ _ __ ___  ___
     '-d', '--desc',
     is_flag=True,
     help='Sort columns in descending order')
+@click.option(
+    '--top',
+    type=click.IntRange(min=1),
+    default=None,
+    metavar='N',
+    help='Scan the whole tree and show the N largest directories and '
+    + 'N largest files at any depth'
+)
+@click.option(
+    '--depth',
+    type=click.IntRange(min=0),
+    default=None,
+    metavar='N',
+    help='Show the cumulative size of every directory down to N levels '
+    + 'below the path, like du -d N, all from a single walk'
+)
+@click.option(
+    '--since',
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    metavar='SNAPSHOT',
+    help='Show which directories grew since SNAPSHOT was saved, and by '
+    + 'how much'
+)
+@click.option(
+    '--against',
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    metavar='SNAPSHOT',
+    help='Compare --since to this snapshot instead of scanning again'
+)
+@click.option(
+    '--save-snapshot',
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    metavar='FILE',
+    help='Save the sizes of every directory in the tree to FILE, to '
+    + 'compare against later with --since'
+)
+@click.option(
+    '--watch',
+    is_flag=True,
+    help='Keep the table live: scan once, then update sizes from '
+    + 'filesystem events (Linux only)'
+)
+@click.option(
+    '--stream',
+    is_flag=True,
+    help='Print rows as soon as they are ready instead of one table at '
+    + 'the end. With --sort the sorted table follows once all is scanned'
+)
+@click.option(
+    '-f', '--format', 'output_format',
+    type=click.Choice(['table', 'csv', 'ndjson']),
+    default='table',
+    help='Print a table, or raw CSV/NDJSON records (sizes in bytes, '
+    + 'dates in epoch seconds) one per line as entries are processed'
+)
+@click.option(
+    '-n', '--limit',
+    type=click.IntRange(min=1),
+    default=None,
+    metavar='N',
+    help='Show at most N rows (after sorting)'
+)
+@click.option(
+    '--offset',
+    type=click.IntRange(min=0),
+    default=0,
+    metavar='M',
+    help='Skip the first M rows (after sorting)'
+)
+@click.option(
+    '--head',
+    is_flag=True,
+    help='Pick the rows to show by the sort key first and format only '
+    + 'those. Shows 10 rows unless --limit is given'
+)
+@click.option(
+    '--large',
+    is_flag=True,
+    help='Keep the listing in compact columns, for directories with '
+    + 'millions of entries'
+)
+@click.option(
+    '-w', '--workers',
+    type=click.IntRange(min=1),
+    default=None,
+    help='Number of threads scanning entries concurrently '
+    + '(By Default it depends on the number of CPUs)'
+)
+@click.option(
+    '-t', '--type-mode',
+    type=click.Choice(['fast', 'magic', 'none']),
+    default='fast',
+    help='How file types are evaluated: by the file extension falling '
+    + 'back to libmagic (fast), always by libmagic (magic) or not at all'
+)
+@click.option(
+    '-b', '--budget',
+    type=click.IntRange(min=1),
+    default=None,
+    metavar='MS',
+    help='Time budget for sizing each directory in milliseconds. Sizes '
+    + 'that take longer are estimated and shown as ~size ±error'
+)
+@click.option(
+    '--io-limit', 'io_limits',
+    multiple=True,
+    callback=parse_io_limits,
+    metavar='CLASS=N',
+    help='How many entries on one device are scanned at once, per kind '
+    + 'of device: rotational (default 2), ssd (32) or network (16). '
+    + 'Can be given for each kind'
+)
+@click.option(
+    '--inode-order',
+    is_flag=True,
+    help='Walk the entries of every directory in the order of their inode '
+    + 'numbers, which cuts down seeking on spinning disks'
+)
+@click.option(
+    '--ignore',
+    is_flag=True,
+    help='Skip what .gitignore and .vizexignore files in the tree ignore, '
+    + 'and .git, sizes don\'t include them either'
+)
+@click.option(
+    '--timeout',
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    metavar='SEC',
+    help='Give up on entries that take longer than SEC seconds, like '
+    + 'directories on a hung network mount. They are shown as timed out '
+    + 'with the size counted so far'
+)
+@click.option(
+    '-c', '--cache',
+    is_flag=True,
+    help='Reuse sizes of directories that didn\'t change since the last '
+    + 'run, kept in ~/.cache/vizex'
+)
 @click.option(
     '-l', '--alias',
     is_flag=True,
@@ -82,7 +309,13 @@ __   _(_)_________  _| |_ _ __ ___  ___
     + 'you don\'t have to repeat the line everytime.'
     + '<-l> should always be the last command in the line'
 )
-def dirs_files(sort: str, all: str, desc: str, path: str, alias: str) -> None:
+def dirs_files(sort: str, all: str, desc: str, path: str, top: int,
+               depth: int, since: str, against: str, save_snapshot: str,
+               output_format: str, limit: int, offset: int, head: bool,
+               watch: bool, stream: bool, large: bool, workers: int,
+               type_mode: str, budget: int, io_limits: dict,
+               inode_order: bool, ignore: bool, timeout: float,
+               cache: bool, alias: str) -> None:
     """
 \b
 ██╗   ██╗██╗███████╗███████╗██╗  ██╗     _  __
@@ -123,8 +356,39 @@ This'll sort in descending order by name and show all the hidden files & folders
 
     # Execute vizexdf
     dir_files = DirectoryFiles(path=dirpath, sort_by=sort_by,
-                               show_hidden=show, desc=desc_sort)
-    dir_files.print_tabulated_data()
+                               show_hidden=show, desc=desc_sort,
+                               workers=workers, use_cache=cache,
+                               type_mode=type_mode,
+                               budget=budget / 1000 if budget else None,
+                               limit=limit or (10 if head else None),
+                               offset=offset, timeout=timeout,
+                               device_limits=io_limits,
+                               inode_order=inode_order, ignore=ignore)
+    if top:
+        dir_files.print_largest(top)
+    elif depth is not None:
+        dir_files.print_rollup(depth)
+    elif since:
+        try:
+            dir_files.print_growth(since, against, save_snapshot)
+        except (ValueError, OSError) as e:
+            raise click.ClickException(str(e))
+    elif save_snapshot:
+        snapshot = dir_files.take_snapshot()
+        snapshot.save(save_snapshot)
+        print(f'Saved sizes of {len(snapshot)} directories to {save_snapshot}')
+    elif watch:
+        dir_files.print_live_data()
+    elif output_format != 'table':
+        dir_files.print_records(output_format)
+    elif head:
+        dir_files.print_head_data()
+    elif large:
+        dir_files.print_columnar_data()
+    elif stream:
+        dir_files.print_streaming_data()
+    else:
+        dir_files.print_tabulated_data()
 
 
 # ----- vizex options and arguments -----
@@ -0,0 +1,208 @@
+'''
+Ignore rules from .gitignore and .vizexignore files, for pruning walks
+'''
+
+import os
+import re
+
+from typing import Iterable, NamedTuple, Optional
+
+
+IGNORE_FILES = ('.gitignore', '.vizexignore')
+# ignored even without any ignore file, like git does
+DEFAULT_PATTERNS = ('.git/',)
+
+
+class IgnorePattern(NamedTuple):
+    """
+    A single line of an ignore file, translated into a regular expression
+    over paths relative to the directory of the file
+    """
+    regex: str
+    negate: bool = False
+    dir_only: bool = False
+
+
+def parse_pattern(line: str) -> Optional[IgnorePattern]:
+    """
+    Translates a line of an ignore file, with the gitignore syntax.
+
+    Returns:
+        IgnorePattern: None for blank lines and comments
+    """
+    line = line.rstrip('\n')
+    # trailing spaces don't count, unless they're escaped
+    line = re.sub(r'(?<!\\) +$', '', line)
+    if not line or line.startswith('#'):
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    # a slash anywhere but at the end ties the pattern to the directory
+    # of the ignore file, otherwise it matches names at any depth
+    anchored = '/' in line
+    regex = _translate(line.lstrip('/'))
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return IgnorePattern(regex, negate, dir_only)
+
+
+def _translate(glob: str) -> str:
+    """Translates a glob with ** into a regular expression"""
+    parts = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if glob.startswith('**', i) and (i == 0 or glob[i - 1] == '/') \
+                and (i + 2 == n or glob[i + 2] == '/'):
+            if i + 2 == n:
+                parts.append('.*')  # everything inside
+            else:
+                parts.append('(?:.*/)?')  # any number of directories
+                i += 1
+            i += 2
+            continue
+        i += 1
+        if c == '*':
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '\\' and i < n:
+            parts.append(re.escape(glob[i]))
+            i += 1
+        elif c == '[':
+            j = i
+            if j < n and glob[j] in '!^':
+                j += 1
+            if j < n and glob[j] == ']':
+                j += 1
+            while j < n and glob[j] != ']':
+                j += 1
+            if j >= n:
+                parts.append(re.escape(c))
+                continue
+            chars = glob[i:j].replace('\\', '\\\\')
+            if chars[0] in '!^':
+                chars = '^' + chars[1:]
+            parts.append(f'[{chars}]')
+            i = j + 1
+        else:
+            parts.append(re.escape(c))
+    return ''.join(parts)
+
+
+class IgnoreRules:
+    """
+    Patterns of one ignore file. They're all compiled into a single
+    regular expression (one for directories and one for files), with
+    the patterns as alternatives from the last to the first. So a path
+    is checked with one call, and the first alternative that matches is
+    the last matching pattern of the file, which is the one that counts.
+    """
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        self.patterns = tuple(
+            pattern for pattern in map(parse_pattern, lines) if pattern)
+        self._regexes = {
+            is_dir: self._compile(is_dir) for is_dir in (True, False)
+        }
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    @classmethod
+    def read(cls, filename: str) -> Optional['IgnoreRules']:
+        """
+        Returns:
+            IgnoreRules: of the file, None if it's missing or has no rules
+        """
+        try:
+            with open(filename, encoding='utf-8', errors='replace') as file:
+                rules = cls(file)
+        except OSError:
+            return None
+        return rules or None
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Returns:
+            bool: whether the path is ignored, None if no pattern matches
+        """
+        regex = self._regexes[is_dir]
+        match = regex.fullmatch(path) if regex else None
+        if match is None:
+            return None
+        return not self.patterns[int(match.lastgroup[1:])].negate
+
+    def _compile(self, is_dir: bool):
+        alternatives = [
+            f'(?P<r{index}>{pattern.regex})'
+            for index, pattern in reversed(list(enumerate(self.patterns)))
+            if is_dir or not pattern.dir_only
+        ]
+        if not alternatives:
+            return None
+        return re.compile('|'.join(alternatives), re.DOTALL)
+
+
+class IgnoreMatcher:
+    """
+    Tells the walks which entries under a root are ignored, by the ignore
+    files of the directory they're in and of every directory above it up
+    to the root, the deeper files taking precedence. Walks check every
+    entry before they stat or descend into it, so ignored subtrees are
+    never opened.
+
+    The rules that apply in a directory are put together once, when the
+    first of its entries is checked, and then it's a single match per
+    ignore file on the way.
+    """
+
+    def __init__(self, root: str, patterns: Iterable[str] = DEFAULT_PATTERNS,
+                 files: Iterable[str] = IGNORE_FILES) -> None:
+        self.root = root
+        self.files = tuple(files)
+        defaults = IgnoreRules(patterns)
+        levels = ((('', defaults),) if defaults else ()) + self._read(root)
+        # directory -> (path of the directory relative to where the
+        # rules come from, rules) from the root down
+        self._levels = {root: levels}
+        self._levels[os.path.normpath(root)] = levels
+
+    def ignored(self, directory: str, name: str, is_dir: bool) -> bool:
+        """Whether an entry of a directory is ignored"""
+        for prefix, rules in reversed(self._levels_of(directory)):
+            verdict = rules.match(prefix + name, is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+    def _levels_of(self, directory: str) -> tuple:
+        levels = self._levels.get(directory)
+        below = []
+        while levels is None:
+            parent, name = os.path.split(directory)
+            if not name or parent == directory:
+                levels = ()  # not under the root
+                break
+            below.append((directory, name))
+            directory = parent
+            levels = self._levels.get(directory)
+        for directory, name in reversed(below):
+            levels = tuple((prefix + name + '/', rules)
+                           for prefix, rules in levels) \
+                + self._read(directory)
+            self._levels[directory] = levels
+        return levels
+
+    def _read(self, directory: str) -> tuple:
+        levels = ()
+        for name in self.files:
+            rules = IgnoreRules.read(os.path.join(directory, name))
+            if rules is not None:
+                levels += (('', rules),)
+        return levels
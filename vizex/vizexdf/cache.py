@@ -0,0 +1,161 @@
+'''
+Persistent cache of directory scans for vizexdf
+'''
+
+import os
+import sys
+import time
+import sqlite3
+import threading
+
+from typing import Optional, Tuple
+
+
+def default_cache_path() -> str:
+    """Location of the cache database, honors $XDG_CACHE_HOME"""
+    root = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'vizex', 'sizes.sqlite3')
+
+
+def _signed(number: int) -> int:
+    """Folds unsigned 64 bit ids (st_dev, st_ino) into SQLite's INTEGER"""
+    return number - (1 << 64) if number >= (1 << 63) else number
+
+
+class SizeCache:
+    """
+    SQLite backed cache of what a single directory holds: the total size
+    of its own files and the names of its subdirectories. Records are
+    keyed by the (st_dev, st_ino) of the directory and are only valid
+    while its st_mtime_ns is unchanged, which is the case as long as no
+    entry was added, removed or renamed in it. Cumulative sizes are then
+    put back together from the records without listing the directories
+    or stat'ing a single file.
+
+    Files that grow in place don't touch the mtime of their directory,
+    so records also expire after `max_age` seconds. The database is
+    trimmed to the `max_entries` most recently used records on close.
+    """
+
+    # Directories modified this recently could still change within the
+    # same mtime tick of coarse-grained filesystems, don't trust them
+    RACY_NS = 2 * 10 ** 9
+    FLUSH_EVERY = 1000
+    # bumped whenever the layout of the table changes
+    VERSION = 1
+
+    def __init__(self,
+                 path: str = None,
+                 max_age: float = 24 * 60 * 60,
+                 max_entries: int = 2_000_000) -> None:
+        self.path = path or default_cache_path()
+        self.max_age = max_age
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._stored = []
+        self._used = []
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        version, = self._db.execute('PRAGMA user_version').fetchone()
+        if version != self.VERSION:
+            # it's only a cache, records of older versions are dropped
+            self._db.execute('DROP TABLE IF EXISTS dirs')
+            self._db.execute(f'PRAGMA user_version = {self.VERSION}')
+        # names of the subdirectories are kept as the bytes the
+        # filesystem has, separated by NULs, so any name can be stored
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS dirs ('
+            ' dev INTEGER NOT NULL, ino INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL,'
+            ' subdirs BLOB NOT NULL, scanned REAL NOT NULL,'
+            ' used REAL NOT NULL, PRIMARY KEY (dev, ino))'
+        )
+        self._db.execute(
+            'CREATE INDEX IF NOT EXISTS dirs_used ON dirs (used)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def lookup(self, stat: os.stat_result) -> Optional[Tuple[int, list]]:
+        """
+        Looks up a directory by the result of its stat.
+
+        Returns:
+            tuple: size of the directory's own files and the names of
+                    its subdirectories, None if nothing valid is cached
+        """
+        key = (_signed(stat.st_dev), _signed(stat.st_ino))
+        with self._lock:
+            row = self._db.execute(
+                'SELECT mtime_ns, size, subdirs, scanned FROM dirs'
+                ' WHERE dev = ? AND ino = ?', key
+            ).fetchone()
+            if row is None:
+                return None
+            mtime_ns, size, subdirs, scanned = row
+            now = time.time()
+            if mtime_ns != stat.st_mtime_ns or now - scanned > self.max_age:
+                return None
+            self._used.append((now, *key))
+        return size, [os.fsdecode(name) for name in subdirs.split(b'\0')] \
+            if subdirs else []
+
+    def store(self, stat: os.stat_result, size: int, subdirs: list) -> None:
+        """
+        Remembers the size of a directory's own files and the names of
+        its subdirectories. Writes are batched, the record can be looked
+        up once it's flushed.
+        """
+        if time.time_ns() - stat.st_mtime_ns < self.RACY_NS:
+            return
+        now = time.time()
+        record = (_signed(stat.st_dev), _signed(stat.st_ino),
+                  stat.st_mtime_ns, size,
+                  b'\0'.join(map(os.fsencode, subdirs)), now, now)
+        with self._lock:
+            self._stored.append(record)
+            if len(self._stored) >= self.FLUSH_EVERY:
+                self._flush()
+
+    def flush(self) -> None:
+        """Writes out pending records"""
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        """
+        Flushes pending records, trims the cache and closes it. The cache
+        is closed even if it can't be written to.
+        """
+        with self._lock:
+            try:
+                self._flush()
+                self._db.execute(
+                    'DELETE FROM dirs WHERE rowid IN (SELECT rowid FROM dirs'
+                    ' ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f'Could not save the cache ::> {e}', file=sys.stderr)
+            finally:
+                self._db.close()
+
+    def _flush(self) -> None:
+        if self._stored:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?, ?, ?)',
+                self._stored
+            )
+            self._stored.clear()
+        if self._used:
+            self._db.executemany(
+                'UPDATE dirs SET used = ? WHERE dev = ? AND ino = ?',
+                self._used
+            )
+            self._used.clear()
+        self._db.commit()
@@ -0,0 +1,111 @@
+'''
+Compact columnar storage of huge directory listings for vizexdf
+'''
+
+import array
+import numpy as np
+
+
+class EntryColumns:
+    """
+    Keeps a directory listing as parallel columns instead of a tuple of
+    decorated objects per entry. Modification times, sizes and type ids
+    are packed into typed arrays, each type name is stored only once,
+    and names are the only per-entry Python objects left. Sorting is
+    done on the raw columns with numpy's argsort and rows are turned
+    into Python values only when they're asked for.
+    """
+
+    def __init__(self) -> None:
+        self.names = []
+        self.mtimes = array.array('d')
+        self.sizes = array.array('q')
+        self.type_ids = array.array('i')
+        self.types = []
+        self.errors = {}  # sparse, only for estimated sizes
+        self.partial = set()  # entries that timed out
+        self._type_ids = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def append(self, name: str, mtime: float, size: int,
+               type_name: str) -> int:
+        """
+        Adds an entry to the columns.
+
+        Returns:
+            int: index of the added entry
+        """
+        type_id = self._type_ids.get(type_name)
+        if type_id is None:
+            type_id = self._type_ids[type_name] = len(self.types)
+            self.types.append(type_name)
+        self.names.append(name)
+        self.mtimes.append(mtime)
+        self.sizes.append(size)
+        self.type_ids.append(type_id)
+        return len(self.names) - 1
+
+    def set_size(self, index: int, size: int, error: int = None,
+                 partial: bool = False) -> None:
+        """
+        Fills in the size of an entry, error if it's an estimate and
+        partial if it's only what was counted before it timed out
+        """
+        self.sizes[index] = size
+        if error is not None:
+            self.errors[index] = error
+        if partial:
+            self.partial.add(index)
+
+    def order(self, by: str = None, desc: bool = False,
+              count: int = None) -> np.ndarray:
+        """
+        Sorts the entries by one of the columns without moving any data.
+        If only the first `count` entries are needed, numeric columns
+        are partitioned first so only those few entries get sorted.
+
+        Args:
+            by (str): 'name', 'dt', 'size' or 'type', anything else keeps
+                    the order in which the entries were added
+            desc (bool): to sort in descending order
+            count (int, optional): how many of the first entries to return
+
+        Returns:
+            np.ndarray: indices of the entries in sorted order
+        """
+        if by == 'name':
+            key = np.array(self.names, dtype=object)
+        elif by == 'dt':
+            key = np.frombuffer(self.mtimes, dtype=np.float64)
+        elif by == 'size':
+            key = np.frombuffer(self.sizes, dtype=np.int64)
+        elif by == 'type':
+            # rank of every type name, so the ids sort alphabetically
+            ranks = np.empty(len(self.types), dtype=np.int32)
+            ranks[np.argsort(np.array(self.types, dtype=object))] = \
+                np.arange(len(self.types), dtype=np.int32)
+            key = ranks[np.frombuffer(self.type_ids, dtype=np.int32)]
+        else:
+            return np.arange(len(self), dtype=np.int64)[:count]
+
+        if count is not None and count < len(self) and key.dtype != object:
+            key = -key if desc else key
+            first = np.argpartition(key, count - 1)[:count]
+            return first[np.argsort(key[first], kind='stable')]
+
+        indices = np.argsort(key, kind='stable')
+        return (indices[::-1] if desc else indices)[:count]
+
+    def row(self, index: int) -> tuple:
+        """
+        Returns:
+            tuple: name, mtime, size, type name, the error of the size
+                    (None unless it's estimated) and whether the size is
+                    partial of an entry
+        """
+        index = int(index)
+        return (self.names[index], self.mtimes[index], self.sizes[index],
+                self.types[self.type_ids[index]], self.errors.get(index),
+                index in self.partial)
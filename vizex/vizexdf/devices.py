@@ -0,0 +1,140 @@
+'''
+Devices behind directories and how hard each of them can be hit
+'''
+
+import os
+import re
+
+from typing import NamedTuple
+
+
+MOUNTINFO = '/proc/self/mountinfo'
+SYS_DEV_BLOCK = '/sys/dev/block'
+
+DEVICE_CLASSES = ('rotational', 'ssd', 'network')
+
+# Concurrent walks per device. A spinning disk seeks itself to death
+# with more than a couple, network shares are bound by latency and
+# want many requests in flight, flash takes whatever it gets.
+DEFAULT_LIMITS = {
+    'rotational': 2,
+    'ssd': 32,
+    'network': 16,
+}
+
+NETWORK_FILESYSTEMS = {
+    '9p', 'afs', 'beegfs', 'ceph', 'cifs', 'coda', 'davfs', 'glusterfs',
+    'gpfs', 'lustre', 'ncpfs', 'nfs', 'nfs4', 'smb3', 'smbfs',
+    'fuse.gcsfuse', 'fuse.glusterfs', 'fuse.rclone', 'fuse.s3fs',
+    'fuse.sshfs',
+}
+
+ESCAPED = re.compile(r'\\([0-7]{3})')
+
+
+class Mount(NamedTuple):
+    device: int
+    mount_point: str
+    fstype: str
+    source: str
+
+
+def read_mounts(mountinfo: str = MOUNTINFO) -> list:
+    """
+    Reads the mount table of the process.
+
+    Returns:
+        list: of Mounts in the order they were mounted, empty if there's
+                no mount table (not on Linux)
+    """
+    mounts = []
+    try:
+        with open(mountinfo) as file:
+            for line in file:
+                fields, _, extra = line.partition(' - ')
+                fields, extra = fields.split(), extra.split()
+                major, minor = map(int, fields[2].split(':'))
+                mount_point = ESCAPED.sub(
+                    lambda match: chr(int(match.group(1), 8)), fields[4])
+                mounts.append(Mount(os.makedev(major, minor), mount_point,
+                                    extra[0], extra[1]))
+    except (OSError, ValueError, IndexError):
+        pass
+    return mounts
+
+
+class DeviceMap:
+    """
+    Tells which device an entry lives on and what kind of device that is,
+    without touching the entry itself. A directory is on a different
+    device than its parent only if something is mounted on it, and the
+    mount table knows which device that is. So a hung network mount is
+    never stat'ed just to find out where it is.
+
+    Devices are classified as:
+
+    network    - mounted with a network filesystem
+    rotational - block devices that /sys reports as rotational
+    ssd        - everything else, including memory backed filesystems
+    """
+
+    def __init__(self, limits: dict = None, mountinfo: str = MOUNTINFO,
+                 sysfs: str = SYS_DEV_BLOCK) -> None:
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.sysfs = sysfs
+        mounts = read_mounts(mountinfo)
+        # later mounts hide the earlier ones on the same path
+        self._mount_points = {mount.mount_point: mount for mount in mounts}
+        self._devices = {mount.device: mount for mount in mounts}
+        self._classes = {}
+
+    def device_of(self, path: str, parent_device: int) -> int:
+        """Device of an entry in a directory on `parent_device`"""
+        # mount points are absolute, entries of '.' look like './home'
+        mount = self._mount_points.get(os.path.abspath(path))
+        return parent_device if mount is None else mount.device
+
+    def classify(self, device: int) -> str:
+        """
+        Returns:
+            str: 'network', 'rotational' or 'ssd'
+        """
+        kind = self._classes.get(device)
+        if kind is None:
+            kind = self._classes[device] = self._classify(device)
+        return kind
+
+    def limit(self, device: int) -> int:
+        """How many walks can run on a device at once"""
+        return self.limits[self.classify(device)]
+
+    def _classify(self, device: int) -> str:
+        mount = self._devices.get(device)
+        if mount is not None and mount.fstype in NETWORK_FILESYSTEMS:
+            return 'network'
+        rotational = self._rotational(device)
+        if rotational is None and mount is not None \
+                and mount.source.startswith('/dev/'):
+            # filesystems like btrfs show up with an anonymous device,
+            # the block device they were mounted from is the real one
+            try:
+                rotational = self._rotational(os.stat(mount.source).st_rdev)
+            except OSError:
+                pass
+        return 'rotational' if rotational else 'ssd'
+
+    def _rotational(self, device: int):
+        """
+        Returns:
+            bool: what /sys says, None if it's not a block device
+        """
+        node = os.path.realpath(os.path.join(
+            self.sysfs, f'{os.major(device)}:{os.minor(device)}'))
+        # partitions don't have a queue, the whole disk does
+        for folder in (node, os.path.dirname(node)):
+            try:
+                with open(os.path.join(folder, 'queue', 'rotational')) as f:
+                    return f.read().strip() == '1'
+            except OSError:
+                continue
+        return None
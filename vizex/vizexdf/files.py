@@ -4,13 +4,34 @@ Collect and organize data about files and directories
 
 import os
 import sys
+import re
+import time
+import heapq
+import asyncio
+import sqlite3
+import threading
+import contextlib
 import concurrent.futures
-import magic
 
 from tabulate import tabulate
 from colored import fg, stylize
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from tools import bytes_to_human_readable, normalize_date, DecoratedData
+from ignore import IgnoreMatcher
+from .cache import SizeCache
+from .columns import EntryColumns
+from .devices import DeviceMap
+from .filetypes import FileTypeDetector, DIR_TYPE
+from .output import EntryRecord, WRITERS
+from .watch import Inotify, LiveTree
+from .pool import DaemonThreadPool
+from .scanner import TreeScanner, ScanProgress
+from .snapshot import Snapshot, diff
+
+
+HEADERS = ['name', 'last modified (dt)', 'size', 'type']
+COLUMN_WIDTHS = (38, 20, 22, 24)
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
 
 
 @dataclass
@@ -24,6 +45,16 @@ class DirectoryFiles:
     show_hidden: bool = False
     sort_by: str = None
     desc: bool = False
+    workers: int = None
+    use_cache: bool = False
+    type_mode: str = 'fast'
+    budget: float = None
+    limit: int = None
+    offset: int = 0
+    timeout: float = None
+    device_limits: dict = None
+    inode_order: bool = False
+    ignore: bool = False
 
     @staticmethod
     def get_dir_size(start_path: str) -> int:
@@ -37,24 +68,32 @@ class DirectoryFiles:
         Returns:
             int: the size of all files in a given path in bytes
         """
-        total_size = 0
-        for dirpath, _, filenames in os.walk(start_path):
-            for file in filenames:
-                fpath = os.path.join(dirpath, file)
-                try:
-                    total_size += os.path.getsize(fpath)
-                except FileNotFoundError:
-                    # Could be a broken symlink or some other weirdness.
-                    # Trap the error here so that the directory can continue
-                    # to be successfully processed.
-                    continue
-        return total_size
+        return TreeScanner().total_size(start_path)
 
     @staticmethod
     def is_hidden(entry: str) -> bool:
         """Check if given entry is a hidden file or folder"""
         return entry.name.startswith('.')
 
+    def _scanner(self, cache: SizeCache = None,
+                 cancel: threading.Event = None) -> TreeScanner:
+        """Scanner that sizes the directories of the listing"""
+        return TreeScanner(cache=cache, cancel=cancel, budget=self.budget,
+                           inode_order=self.inode_order,
+                           ignore=self._ignore_rules())
+
+    def _ignore_rules(self) -> IgnoreMatcher:
+        """Ignore rules of the path, None unless they're used"""
+        return IgnoreMatcher(self.path) if self.ignore else None
+
+    def _skipped(self, entry: os.DirEntry,
+                 ignore: IgnoreMatcher = None) -> bool:
+        """Whether an entry of the path is left out of the listing"""
+        if self.is_hidden(entry) and not self.show_hidden:
+            return True
+        return ignore is not None and ignore.ignored(
+            self.path, entry.name, entry.is_dir())
+
     @classmethod
     def sort_data(cls, data: list, by: str, desc: bool) -> None:
         """
@@ -74,68 +113,79 @@ class DirectoryFiles:
         elif by == 'size':
             column = 2
         else:
-            column = -1
+            column = 3
 
         # Sort data inplace based on user's choice
         data.sort(key=lambda x: x[column], reverse=desc)
 
     @classmethod
-    def _decorate_dir_entry(cls, entry) -> tuple:
+    def _decorate(cls, name: str, mtime: float, size: int, type_name: str,
+                  error: int = None, partial: bool = False) -> tuple:
         """
-        Decorates given entry for a directory. Decorate means that creates
-        a colored representation of a name of the entry, grabs
-        the date it was last modified and size in bytes and decorates.
-        collects everything and returns as a list.
-        """
-
-        # Gives orange color to the string & truncate to 32 chars
-        name = entry.split('/')[-1]
-        current = [stylize("■ " + name[:33] + "/", fg(202))]
+        Decorates raw values of an entry. Decorate means that creates
+        a colored representation of a name of the entry, and turns the
+        date it was last modified and size in bytes into human readable
+        strings that still sort by their raw values.
 
-        # Get date and convert in to a human readable format
-        date = os.stat(entry).st_mtime
-        current.append(
-            DecoratedData(date, normalize_date('%h %d %Y %H:%M', date))
-        )
+        Args:
+            name (str): of the file or directory
+            mtime (float): date of the last modification
+            size (int): in bytes
+            type_name (str): MIME type or DIR_TYPE for directories
+            error (int, optional): error bound if the size is estimated
+            partial (bool, optional): if the entry timed out
 
-        # recursively calculates the total size of a folder
-        byte = DirectoryFiles().get_dir_size(entry)
-        current.append(
-            DecoratedData(byte, bytes_to_human_readable(byte))
-        )
+        Returns:
+            tuple: a row of the table
+        """
+        if type_name == DIR_TYPE:
+            # Gives orange color to the string & truncate to 32 chars
+            name = stylize("■ " + name[:33] + "/", fg(202))
+        else:
+            # Gives yellow color to the string & truncate to 32 chars
+            name = stylize("» " + name[:33], fg(226))
 
-        current.append('-')  # add directory type identifier
-        return tuple(current)
+        if partial:
+            date = DecoratedData(mtime, '-')
+        else:
+            date = DecoratedData(mtime,
+                                 normalize_date('%h %d %Y %H:%M', mtime))
+
+        if partial:
+            byte = DecoratedData(size, 'timed out / '
+                                 + bytes_to_human_readable(size))
+        elif error is None:
+            byte = DecoratedData(size, bytes_to_human_readable(size))
+        else:
+            byte = DecoratedData(size, f'~{bytes_to_human_readable(size)} '
+                                 + f'±{bytes_to_human_readable(error)}')
+        return name, date, byte, type_name
 
     @classmethod
-    def _decorate_file_entry(cls, entry) -> tuple:
+    def _record_dir_entry(cls, entry: os.DirEntry,
+                          scanner: TreeScanner = None) -> EntryRecord:
         """
-        Decorates given entry for a file. By decorate it means that creates
-        a colored representation of a name of the entry, grabs
-        the date it was last modified and size in bytes and decorates,
-        determines file type. collects everything and returns as a list.
+        Collects raw values of a directory entry. Grabs the date it was
+        last modified and the size of the whole subtree, summed up in a
+        single walk which is cut short into an estimate if there is a
+        time budget.
         """
+        date = entry.stat().st_mtime
+        estimate = (scanner or TreeScanner()).estimate_size(entry.path)
+        error = None if estimate.exact else estimate.error
+        return EntryRecord(entry.name, date, estimate.size, DIR_TYPE, error)
 
-        # Gives yellow color to the string & truncate to 32 chars
-        name = entry.split('/')[-1]
-        current = [stylize("» " + name[:33], fg(226))]
-
-        # Convert last modified time (which is in nanoseconds)
-        date = os.stat(entry).st_mtime
-        current.append(
-            DecoratedData(date, normalize_date('%h %d %Y %H:%M', date))
-        )
-
-        byte = os.stat(entry).st_size
-        current.append(
-            DecoratedData(byte, bytes_to_human_readable(byte))
-        )
-
-        # Evaluate the file type
-        current.append(
-            magic.from_file(entry, mime=True)
-        )
-        return tuple(current)
+    @classmethod
+    def _record_file_entry(cls, entry: os.DirEntry,
+                           detector: FileTypeDetector = None) -> EntryRecord:
+        """
+        Collects raw values of a file entry. Grabs the date it was last
+        modified and size in bytes, and determines the file type.
+        """
+        # DirEntry caches its stat, so both values come from one syscall
+        stat = entry.stat()
+        type_name = (detector or FileTypeDetector()).detect(entry.path)
+        return EntryRecord(entry.name, stat.st_mtime, stat.st_size, type_name)
 
     def get_usage(self) -> list:
         """
@@ -145,34 +195,304 @@ class DirectoryFiles:
         path is a file method evaluates its type. Finally, gives
         us the date when the given file/folder was last modified.
 
-        Program runs asynchronously using multiple threads or separate process
+        Entries are processed concurrently by a pool of `workers` threads,
+        the result keeps the order of the directory listing.
 
         Returns:
             list: which is a collection of each entry
                 (files and folders) in a given path.
         """
-        data = []
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            with os.scandir(self.path) as entries:
-                for entry in entries:
-                    try:
-                        current = []
+        ordered = sorted(self._iter_records(), key=lambda x: x[0])
+        return [self._decorate(*record) for _, record in ordered]
+
+    def _max_workers(self) -> int:
+        """Number of worker threads, same default as ThreadPoolExecutor"""
+        return self.workers or min(32, (os.cpu_count() or 1) + 4)
+
+    def _iter_records(self, task_for=None):
+        """
+        Submits every entry of the path to the thread pool and yields
+        raw records as soon as they are finished, not in the order
+        they were submitted. The number of in-flight tasks is capped, so
+        huge directories don't queue up a future per entry at once.
+        Entries are scheduled by the device they're on, each device only
+        gets as many concurrent walks as its kind can take.
+        If the consumer stops early, directory walks still running are
+        cancelled. Entries that run over the `timeout` are given up on
+        and yielded as partial records.
+
+        Args:
+            task_for (callable, optional): picks the task of an entry
+                    like _task_for does, which is the default
+
+        Yields:
+            tuple: position of the entry in the listing and its record
+        """
+        task_for = task_for or self._task_for
+        workers = self._max_workers()
+        max_in_flight = workers * 2
+        pending = {}
+        progress = {}
+        cancel = threading.Event()
+        devices = DeviceMap(self.device_limits)
+        with self._open_cache() as cache, \
+                DaemonThreadPool(workers, devices.limit) as executor:
+            scanner = self._scanner(cache, cancel)
+            detector = FileTypeDetector(self.type_mode)
+            try:
+                root = os.stat(self.path).st_dev
+                with os.scandir(self.path) as entries:
+                    for index, entry in enumerate(entries):
+                        future = self._submit(
+                            executor, entry, task_for, scanner, detector,
+                            progress, devices.device_of(entry.path, root))
+                        if future is None:
+                            continue
+                        pending[future] = index
+
+                        if len(pending) >= max_in_flight:
+                            done, expired = self._wait(executor, pending)
+                            yield from self._collect(done, pending, progress)
+                            yield from self._expire(expired, pending,
+                                                    progress)
+
+                while pending:
+                    done, expired = self._wait(executor, pending)
+                    yield from self._collect(done, pending, progress)
+                    yield from self._expire(expired, pending, progress)
+            finally:
+                cancel.set()
+                for future in pending:
+                    future.cancel()
+
+    def _submit(self, executor: DaemonThreadPool, entry: os.DirEntry,
+                task_for, scanner: TreeScanner, detector: FileTypeDetector,
+                progress: dict, device: int = None):
+        """
+        Hands an entry over to the thread pool to be measured, counted
+        against the limit of the device it's on. With a timeout every
+        entry gets its own progress, kept in `progress` under the
+        entry's future together with its name and type.
+
+        Returns:
+            Future: of the entry's record, None if the entry is skipped
+        """
+        tracker = ScanProgress() if self.timeout else None
+        if tracker is not None:
+            scanner = replace(scanner, progress=tracker)
+        try:
+            task = task_for(entry, scanner, detector)
+        except OSError as e:
+            print(f"Bad Entry ::> {e}", file=sys.stderr)
+            return None
+        if task is None:
+            return None
+        future = executor.submit_to(device, *task)
+        if tracker is not None:
+            type_name = DIR_TYPE if task[2] is scanner else ''
+            progress[future] = (entry.name, type_name, tracker)
+        return future
+
+    def _wait(self, executor: DaemonThreadPool, pending: dict) -> tuple:
+        """
+        Waits until some of the pending tasks finish or, with a timeout,
+        until the earliest running one is due. Tasks that ran over the
+        timeout are abandoned, their threads are left behind.
+
+        Returns:
+            tuple: finished futures and futures that timed out
+        """
+        if not self.timeout:
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            return done, []
+
+        started = [executor.started(future) for future in pending]
+        started = [start for start in started if start is not None]
+        wait_for = self.timeout
+        if started:
+            wait_for = max(0, min(started) + self.timeout - time.monotonic())
+        done, _ = concurrent.futures.wait(
+            pending, wait_for, concurrent.futures.FIRST_COMPLETED)
+
+        expired = []
+        now = time.monotonic()
+        for future in pending:
+            start = executor.started(future)
+            if start is None or now - start < self.timeout \
+                    or future.done():
+                continue
+            if executor.abandon(future):
+                expired.append(future)
+        return done, expired
+
+    @staticmethod
+    def _expire(expired: list, pending: dict, progress: dict):
+        """Yields partial records of entries that timed out"""
+        for future in expired:
+            index = pending.pop(future)
+            name, type_name, tracker = progress.pop(future)
+            print(f"Timed out ::> {name}", file=sys.stderr)
+            yield index, EntryRecord(name, 0.0, tracker.size, type_name,
+                                     partial=True)
+
+    def _task_for(self, entry: os.DirEntry, scanner: TreeScanner,
+                  detector: FileTypeDetector):
+        """
+        Picks how an entry should be measured.
+
+        Returns:
+            tuple: a function with its arguments, None if it's skipped
+        """
+        # Deal with hidden and ignored files and folders
+        if self._skipped(entry, scanner.ignore):
+            return None
+        if entry.is_file():
+            return self._record_file_entry, entry, detector
+        if entry.is_dir():
+            return self._record_dir_entry, entry, scanner
+        return None
+
+    async def aiter_records(self, concurrency: int = None, on_error=None):
+        """
+        Scans the path without blocking the event loop, yielding records
+        of entries as soon as they are measured:
+
+            async for record in DirectoryFiles(path).aiter_records(8):
+                ...
+
+        All the blocking work runs in a thread pool. At most
+        `concurrency` entries are measured at once. Cancelling the task
+        that iterates (or closing the generator) cancels the walks still
+        running, they stop within a directory or a thousand entries.
 
-                        # Deal with hidden files and folders
-                        if self.is_hidden(entry) and not self.show_hidden:
+        Args:
+            concurrency (int, optional): entries measured at once,
+                    `workers` or the default number of threads if not given
+            on_error (callable, optional): called with the entry and the
+                    exception if an entry couldn't be measured, by default
+                    the error is printed to stderr
+
+        Yields:
+            EntryRecord: raw values of every entry, in completion order
+        """
+        loop = asyncio.get_running_loop()
+        limit = concurrency or self._max_workers()
+        cancel = threading.Event()
+        executor = DaemonThreadPool(limit)
+        pending = {}
+        try:
+            with self._open_cache() as cache:
+                scanner = self._scanner(cache, cancel)
+                detector = FileTypeDetector(self.type_mode)
+                try:
+                    entries = await loop.run_in_executor(
+                        executor, self._list_entries)
+                    for entry in entries:
+                        try:
+                            task = self._task_for(entry, scanner, detector)
+                        except OSError as e:
+                            self._report(entry, e, on_error)
+                            continue
+                        if task is None:
                             continue
+                        if len(pending) >= limit:
+                            done, _ = await asyncio.wait(
+                                pending, return_when=asyncio.FIRST_COMPLETED)
+                            for record in self._finished(done, pending,
+                                                         on_error):
+                                yield record
+                        pending[loop.run_in_executor(executor, *task)] = entry
+
+                    while pending:
+                        done, _ = await asyncio.wait(
+                            pending, return_when=asyncio.FIRST_COMPLETED)
+                        for record in self._finished(done, pending, on_error):
+                            yield record
+                finally:
+                    # walks still running have to stop before the cache
+                    # they write to is closed
+                    cancel.set()
+                    for future in pending:
+                        future.cancel()
+        finally:
+            executor.shutdown(wait=False)
+
+    def _list_entries(self) -> list:
+        """Lists the entries of the path"""
+        with os.scandir(self.path) as entries:
+            return list(entries)
 
-                        if entry.is_file():
-                            current = executor.submit(
-                                self._decorate_file_entry, entry.path)
-                        elif entry.is_dir():
-                            current = executor.submit(
-                                self._decorate_dir_entry, entry.path)
+    @classmethod
+    def _finished(cls, done, pending: dict, on_error) -> list:
+        """Returns records of finished tasks and forgets about them"""
+        records = []
+        for future in done:
+            entry = pending.pop(future)
+            try:
+                records.append(future.result())
+            except Exception as e:
+                cls._report(entry, e, on_error)
+        return records
 
-                        data.append(current.result())
-                    except Exception as e:
-                        print(f"Bad Entry ::> {e}", file=sys.stderr)
-        return data
+    @staticmethod
+    def _report(entry: os.DirEntry, error: Exception, on_error) -> None:
+        """Hands a failed entry over to on_error or prints it to stderr"""
+        if on_error:
+            on_error(entry, error)
+        else:
+            print(f"Bad Entry ::> {error}", file=sys.stderr)
+
+    def _open_cache(self):
+        """
+        Opens the persistent size cache if it was asked for. Falls back
+        to scanning without it if the cache can't be opened.
+        """
+        if self.use_cache:
+            try:
+                return SizeCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Cache unavailable ::> {e}", file=sys.stderr)
+        return contextlib.nullcontext()
+
+    @staticmethod
+    def _collect(done, pending: dict, progress: dict = None):
+        """Yields results of finished futures and forgets about them"""
+        for future in done:
+            index = pending.pop(future)
+            if progress:
+                progress.pop(future, None)
+            try:
+                yield index, future.result()
+            except Exception as e:
+                print(f"Bad Entry ::> {e}", file=sys.stderr)
+
+    def _gather(self, on_record=None) -> list:
+        """
+        Collects records like get_usage does, but Ctrl-C stops the scan
+        and keeps whatever was collected up to that moment.
+
+        Args:
+            on_record (callable, optional): called with every record as
+                    soon as it's collected
+
+        Returns:
+            list: collected records in the order of the directory listing
+        """
+        collected = []
+        records = self._iter_records()
+        try:
+            for index, record in records:
+                collected.append((index, record))
+                if on_record:
+                    on_record(record)
+        except KeyboardInterrupt:
+            print(f'\nInterrupted! Showing {len(collected)} entries '
+                  + 'collected so far', file=sys.stderr)
+        finally:
+            records.close()
+        collected.sort(key=lambda x: x[0])
+        return [record for _, record in collected]
 
     def print_tabulated_data(self) -> tabulate:
         """
@@ -183,16 +503,382 @@ class DirectoryFiles:
             tabulate: a tabulated form of the current
                     the directory's folders and files.
         """
-        headers = [
-            'name',
-            'last modified (dt)',
-            'size',
-            'type'
-        ]
-        result = self.get_usage()
+        result = [self._decorate(*record) for record in self._gather()]
         if self.sort_by:
             self.sort_data(result, self.sort_by, self.desc)
-        print(tabulate(result, headers, tablefmt="rst"))
+        print(tabulate(self._page(result), HEADERS, tablefmt="rst"))
+
+    def _page(self, rows):
+        """Cuts the page selected by `offset` and `limit` out of rows"""
+        end = self.offset + self.limit if self.limit else None
+        return rows[self.offset:end]
+
+    def print_streaming_data(self) -> None:
+        """
+        Prints every row as soon as it's decorated, using fixed column
+        widths instead of waiting for the whole table to be measured.
+        If sorting was asked for, the sorted table of all the rows is
+        printed once the scan is over, cut to the selected page.
+        """
+        print(format_row(HEADERS))
+        print(format_row(['=' * width for width in COLUMN_WIDTHS]))
+
+        result = []
+
+        def print_row(record: EntryRecord) -> None:
+            result.append(self._decorate(*record))
+            print(format_row(result[-1]), flush=True)
+
+        self._gather(on_record=print_row)
+        if self.sort_by:
+            self.sort_data(result, self.sort_by, self.desc)
+            print()
+            print(tabulate(self._page(result), HEADERS, tablefmt="rst"))
+
+    def print_records(self, output_format: str) -> None:
+        """
+        Writes raw records in a machine readable format: sizes in bytes
+        and dates as epoch seconds, no colors and no table. Unless they
+        have to be sorted or paged, records are written one per line as
+        soon as entries are processed.
+
+        Args:
+            output_format (str): 'csv' or 'ndjson'
+        """
+        writer = WRITERS[output_format](sys.stdout)
+        if not (self.sort_by or self.limit or self.offset):
+            self._gather(on_record=writer.write)
+            return
+        records = self._gather()
+        if self.sort_by:
+            self.sort_data(records, self.sort_by, self.desc)
+        for record in self._page(records):
+            writer.write(record)
+
+    def get_largest(self, count: int) -> tuple:
+        """
+        Walks the whole tree under the path once and keeps the `count`
+        largest directories and files on two bounded heaps, so memory
+        stays proportional to `count` however big the tree is. Ctrl-C
+        stops the walk and keeps the largest entries found so far.
+
+        Args:
+            count (int): how many directories and files to keep
+
+        Returns:
+            tuple: lists of (size, path) pairs of the largest directories
+                    and the largest files, largest first
+        """
+        dirs, files = [], []
+        prefix = os.path.join(self.path, '')
+        try:
+            scanner = TreeScanner(with_files=True,
+                                  inode_order=self.inode_order,
+                                  ignore=self._ignore_rules())
+            for entry in scanner.walk(self.path):
+                if not entry.depth:
+                    continue  # the path itself is always the largest
+                relative = entry.path[len(prefix):]
+                if not self.show_hidden and (relative.startswith('.')
+                                             or '/.' in relative):
+                    continue
+                heap = dirs if entry.is_dir else files
+                item = (entry.size, relative)
+                if len(heap) < count:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        except KeyboardInterrupt:
+            print('\nInterrupted! Showing the largest entries found so far',
+                  file=sys.stderr)
+
+        def largest_first(item):
+            return -item[0], item[1]
+        return (sorted(dirs, key=largest_first),
+                sorted(files, key=largest_first))
+
+    def print_largest(self, count: int) -> None:
+        """
+        Prints tables of the `count` largest directories and files
+        found anywhere in the tree under the path.
+        """
+        dirs, files = self.get_largest(count)
+        print(tabulate(
+            [(stylize("■ " + path + "/", fg(202)),
+              DecoratedData(size, bytes_to_human_readable(size)))
+             for size, path in dirs],
+            ['largest directories', 'size'], tablefmt="rst"
+        ))
+        print()
+        print(tabulate(
+            [(stylize("» " + path, fg(226)),
+              DecoratedData(size, bytes_to_human_readable(size)))
+             for size, path in files],
+            ['largest files', 'size'], tablefmt="rst"
+        ))
+
+    def get_rollup(self, depth: int) -> list:
+        """
+        Walks the tree under the path once and rolls the sizes up into
+        every directory down to `depth` levels below it, like du -d.
+        Directories deeper than that are added to their ancestors but
+        not kept. Subdirectories are sorted by name or size if asked to,
+        otherwise they keep the order of the listing.
+
+        Args:
+            depth (int): how many levels below the path to show
+
+        Returns:
+            list: (level, name, cumulative size) of every directory in
+                    pre-order, the path itself comes first at level 0
+        """
+        children = {}
+        # subdirectories are matched to their parent by dirname, which a
+        # trailing slash on the path would never be equal to
+        path = os.path.normpath(self.path)
+        with self._open_cache() as cache:
+            scanner = TreeScanner(cache=cache, inode_order=self.inode_order,
+                                  ignore=self._ignore_rules())
+            for entry in scanner.walk(path):
+                if entry.depth > depth:
+                    continue
+                # post-order, so all the subdirectories are in already
+                subdirs = children.pop(entry.path, [])
+                if not entry.depth:
+                    root = (path, entry.size, subdirs)
+                    break
+                name = os.path.basename(entry.path)
+                if self.show_hidden or not name.startswith('.'):
+                    children.setdefault(os.path.dirname(entry.path), []) \
+                        .append((name, entry.size, subdirs))
+
+        column = {'name': 0, 'size': 1}.get(self.sort_by)
+        rollup = []
+        stack = [(0, root)]
+        while stack:
+            level, (name, size, subdirs) = stack.pop()
+            rollup.append((level, name, size))
+            if column is not None:
+                subdirs.sort(key=lambda node: node[column], reverse=self.desc)
+            stack.extend((level + 1, node) for node in reversed(subdirs))
+        return rollup
+
+    def print_rollup(self, depth: int) -> None:
+        """
+        Prints the cumulative sizes of every directory down to `depth`
+        levels below the path, indented by their level.
+        """
+        # guides instead of spaces, tabulate strips leading whitespace
+        rows = [
+            ('│ ' * level + stylize('■ ' + name + '/', fg(202)),
+             DecoratedData(size, bytes_to_human_readable(size)))
+            for level, name, size in self.get_rollup(depth)
+        ]
+        print(tabulate(self._page(rows), ['directory', 'size'],
+                       tablefmt="rst"))
+
+    def take_snapshot(self) -> Snapshot:
+        """Scans the whole tree under the path into a snapshot of sizes"""
+        with self._open_cache() as cache:
+            return Snapshot.from_scan(self.path, TreeScanner(
+                cache=cache, inode_order=self.inode_order,
+                ignore=self._ignore_rules()))
+
+    def get_growth(self, since: Snapshot, current: Snapshot) -> list:
+        """
+        Compares an older snapshot to a current one.
+
+        Returns:
+            list: (path, old size, new size) of the directories that
+                    changed, the ones that grew the most first. Hidden
+                    directories are left out unless -a is given
+
+        Raises:
+            ValueError: if either snapshot isn't of the path
+        """
+        root = os.path.abspath(self.path)
+        for snapshot in (since, current):
+            if snapshot.root != root:
+                raise ValueError(f'The snapshot is of {snapshot.root}, '
+                                 + f'not of {root}')
+        changes = []
+        for path, before, after in diff(since, current):
+            hidden = path != '.' and (path.startswith('.') or '/.' in path)
+            if self.show_hidden or not hidden:
+                changes.append((path, before, after))
+        changes.sort(key=lambda change: (change[1] - change[2], change[0]))
+        return changes
+
+    def print_growth(self, since: str, against: str = None,
+                     save: str = None) -> None:
+        """
+        Prints which directories grew (or shrank) and by how much since
+        a snapshot was saved.
+
+        Args:
+            since (str): file of the older snapshot
+            against (str, optional): file of the newer snapshot, the path
+                    is scanned again if it's not given
+            save (str, optional): file to save the new scan to
+
+        Raises:
+            ValueError: if a snapshot isn't a vizex snapshot or isn't of
+                    the path
+        """
+        old = Snapshot.load(since)
+        current = Snapshot.load(against) if against else self.take_snapshot()
+        if save:
+            current.save(save)
+        changes = self.get_growth(old, current)
+        rows = [
+            (stylize("■ " + path, fg(202)),
+             DecoratedData(before, bytes_to_human_readable(before)),
+             DecoratedData(after, bytes_to_human_readable(after)),
+             DecoratedData(after - before,
+                           ('+' if after >= before else '-')
+                           + bytes_to_human_readable(abs(after - before))))
+            for path, before, after in self._page(changes)
+        ]
+        print(f"Changes since {normalize_date('%Y-%m-%d %H:%M', old.created)}")
+        print(tabulate(rows, ['directory', 'before', 'after', 'growth'],
+                       tablefmt="rst"))
+
+    def get_columns(self) -> EntryColumns:
+        """
+        Collects the listing of the path into compact columns, meant for
+        directories with millions of entries. Files are stat'ed right
+        where they're listed and only directories are handed over to the
+        thread pool to be sized, scheduled like _iter_records does.
+        Ctrl-C stops the scan and keeps the entries collected so far.
+        Directories that run over the `timeout` keep the size counted
+        until then and are marked as partial.
+
+        Returns:
+            EntryColumns: raw names, dates, sizes and types of entries
+        """
+        columns = EntryColumns()
+        rows = {}  # name of a directory being sized -> its index
+
+        def task_for(entry, scanner, detector):
+            if self._skipped(entry, scanner.ignore):
+                return None
+            if entry.is_file():
+                stat = entry.stat()
+                columns.append(entry.name, stat.st_mtime, stat.st_size,
+                               detector.detect(entry.path))
+            elif entry.is_dir():
+                rows[entry.name] = columns.append(
+                    entry.name, entry.stat().st_mtime, 0, DIR_TYPE)
+                return self._record_dir_entry, entry, scanner
+            return None
+
+        records = self._iter_records(task_for)
+        try:
+            for _, record in records:
+                columns.set_size(rows.pop(record.name), record.size,
+                                 record.error, record.partial)
+        except KeyboardInterrupt:
+            print(f'\nInterrupted! Showing {len(columns)} entries '
+                  + 'collected so far', file=sys.stderr)
+        finally:
+            records.close()
+        return columns
+
+    def print_columnar_data(self) -> None:
+        """
+        Prints the listing kept in columns. Rows are sorted by their raw
+        values and only decorated one at a time while being written out,
+        laid out in fixed width columns.
+        """
+        columns = self.get_columns()
+        print(format_row(HEADERS))
+        print(format_row(['=' * width for width in COLUMN_WIDTHS]))
+        sys.stdout.writelines(
+            format_row(self._decorate(*columns.row(index))) + '\n'
+            for index in self._select(columns)
+        )
+
+    def _select(self, columns: EntryColumns):
+        """
+        Picks the indices of the selected page of rows by the raw sort
+        key, before any of them is decorated.
+        """
+        count = self.offset + self.limit if self.limit else None
+        return columns.order(self.sort_by, self.desc, count)[self.offset:]
+
+    def print_head_data(self) -> None:
+        """
+        Prints a table of only the selected page of rows. The listing is
+        collected raw, rows are picked by their raw sort key and only the
+        rows shown get colored and made human readable, so the cost of
+        rendering depends on the page size and not the directory size.
+        """
+        columns = self.get_columns()
+        rows = [self._decorate(*columns.row(index))
+                for index in self._select(columns)]
+        print(tabulate(rows, HEADERS, tablefmt="rst"))
+
+    def print_live_data(self, interval: float = 1.0) -> None:
+        """
+        Scans the path once and then keeps the sizes up to date from
+        filesystem events instead of rescanning, redrawing the table at
+        most once per `interval` seconds when something changed. Runs
+        until it's interrupted with Ctrl-C.
+        """
+        with Inotify() as inotify:
+            tree = LiveTree(self.path, inotify)
+            detector = FileTypeDetector(self.type_mode)
+            last_draw = 0
+            changed = True
+            try:
+                while True:
+                    now = time.monotonic()
+                    if changed and now - last_draw >= interval:
+                        self._draw_live(tree, detector)
+                        last_draw = now
+                        changed = False
+                    changed |= tree.update(interval)
+            except KeyboardInterrupt:
+                pass
+
+    def _draw_live(self, tree: LiveTree, detector: FileTypeDetector) -> None:
+        """Clears the terminal and prints the table of the live tree"""
+        records = []
+        with os.scandir(tree.path) as entries:
+            for entry in entries:
+                if self.is_hidden(entry) and not self.show_hidden:
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        records.append(EntryRecord(
+                            entry.name, entry.stat().st_mtime,
+                            tree.size(entry.path), DIR_TYPE))
+                    elif entry.is_file():
+                        records.append(
+                            self._record_file_entry(entry, detector))
+                except OSError:
+                    continue  # removed since the last event
+        rows = [self._decorate(*record) for record in records]
+        if self.sort_by:
+            self.sort_data(rows, self.sort_by, self.desc)
+        total = bytes_to_human_readable(tree.size(tree.path))
+        sys.stdout.write('\033[2J\033[H')
+        print(tabulate(self._page(rows), HEADERS, tablefmt="rst"))
+        print(f'\nWatching {tree.path} ({total} in total), '
+              + 'press Ctrl-C to stop', flush=True)
+
+
+def format_row(row) -> str:
+    """
+    Lays out a row in fixed width columns. Colored text is padded by
+    its visible length, so escape codes don't shift the columns.
+    """
+    cells = []
+    for cell, width in zip(row, COLUMN_WIDTHS):
+        text = str(cell)
+        visible = len(ANSI_ESCAPE.sub('', text))
+        cells.append(text + ' ' * max(width - visible, 0))
+    return '  '.join(cells).rstrip()
 
 
 if __name__ == '__main__':
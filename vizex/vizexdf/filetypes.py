@@ -0,0 +1,110 @@
+'''
+File type detection for vizexdf
+'''
+
+import os
+import threading
+import mimetypes
+import magic
+
+from typing import Optional
+
+
+TYPE_MODES = ('fast', 'magic', 'none')
+
+# type identifier shown for directories
+DIR_TYPE = '-'
+
+# libmagic finds almost every type within the first few kilobytes
+HEADER_SIZE = 8192
+
+# Suffixes that are common in source trees but missing
+# from (or misleading in) the standard library's table
+EXTRA_TYPES = {
+    '.cfg': 'text/plain',
+    '.go': 'text/x-go',
+    '.ini': 'text/plain',
+    '.ipynb': 'application/json',
+    '.jsonl': 'application/x-ndjson',
+    '.log': 'text/plain',
+    '.lock': 'text/plain',
+    '.rs': 'text/x-rust',
+    '.toml': 'application/toml',
+    '.ts': 'text/x-typescript',
+    '.yaml': 'application/yaml',
+    '.yml': 'application/yaml',
+}
+
+
+def _build_extension_table() -> dict:
+    """
+    Builds the suffix lookup table out of the standard library's
+    defaults only, so the same file gets the same type on every system.
+    """
+    defaults = mimetypes.MimeTypes()
+    table = dict(defaults.types_map[False])
+    table.update(defaults.types_map[True])
+    table.update(EXTRA_TYPES)
+    return table
+
+
+EXTENSION_TYPES = _build_extension_table()
+
+
+class FileTypeDetector:
+    """
+    Evaluates MIME types of files in one of three modes:
+
+    fast  - looks the suffix up in a table and falls back
+            to libmagic only for files it doesn't know
+    magic - always asks libmagic
+    none  - skips type detection altogether
+
+    libmagic handles aren't thread safe and are expensive to create,
+    so each thread opens one and keeps reusing it. Only a bounded
+    header of the file is read and handed to libmagic.
+    """
+
+    def __init__(self, mode: str = 'fast',
+                 header_size: int = HEADER_SIZE) -> None:
+        if mode not in TYPE_MODES:
+            raise ValueError(f'Type mode should be one of {TYPE_MODES}')
+        self.mode = mode
+        self.header_size = header_size
+        self._local = threading.local()
+
+    def detect(self, path: str) -> str:
+        """
+        Evaluates the type of a file at a given path.
+
+        Returns:
+            str: MIME type, '' if detection is turned off
+        """
+        if self.mode == 'none':
+            return ''
+        if self.mode == 'fast':
+            guess = self.guess_from_name(path)
+            if guess:
+                return guess
+        return self.sniff(path)
+
+    @staticmethod
+    def guess_from_name(path: str) -> Optional[str]:
+        """Looks up the type by the file's suffix"""
+        suffix = os.path.splitext(path)[1]
+        if not suffix:
+            return None
+        return EXTENSION_TYPES.get(suffix) \
+            or EXTENSION_TYPES.get(suffix.lower())
+
+    def sniff(self, path: str) -> str:
+        """Evaluates the type from the header of the file with libmagic"""
+        handle = getattr(self._local, 'magic', None)
+        if handle is None:
+            handle = self._local.magic = magic.Magic(mime=True)
+        try:
+            with open(path, 'rb') as file:
+                header = file.read(self.header_size)
+        except OSError:
+            return 'unknown'
+        return handle.from_buffer(header)
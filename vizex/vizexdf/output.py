@@ -0,0 +1,67 @@
+'''
+Raw entry records and their machine readable output for vizexdf
+'''
+
+import sys
+import csv
+import json
+
+from typing import NamedTuple, Optional
+
+
+FORMATS = ('table', 'csv', 'ndjson')
+FIELDS = ('name', 'type', 'size', 'mtime', 'error', 'partial')
+
+
+class EntryRecord(NamedTuple):
+    """
+    Raw values of a single entry before any decoration. Fields are in
+    the same order as the columns of the table, so rows and records sort
+    the same way. The error is only set for estimated sizes. Partial
+    records are of entries that timed out, their size is only what was
+    counted before that and their date isn't known.
+    """
+    name: str
+    mtime: float
+    size: int
+    type: str
+    error: Optional[int] = None
+    partial: bool = False
+
+
+class CsvWriter:
+    """Writes records as CSV lines with a header, sizes in bytes"""
+
+    def __init__(self, stream=None) -> None:
+        self._writer = csv.writer(stream or sys.stdout)
+        self._writer.writerow(FIELDS)
+
+    def write(self, record: EntryRecord) -> None:
+        self._writer.writerow((
+            record.name, record.type, record.size, int(record.mtime),
+            '' if record.error is None else record.error,
+            int(record.partial)
+        ))
+
+
+class NdjsonWriter:
+    """Writes every record as a JSON object on its own line"""
+
+    def __init__(self, stream=None) -> None:
+        self._stream = stream or sys.stdout
+
+    def write(self, record: EntryRecord) -> None:
+        self._stream.write(json.dumps({
+            'name': record.name,
+            'type': record.type,
+            'size': record.size,
+            'mtime': int(record.mtime),
+            'error': record.error,
+            'partial': record.partial,
+        }) + '\n')
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'ndjson': NdjsonWriter,
+}
@@ -0,0 +1,172 @@
+'''
+Thread pool for vizexdf that never keeps the process alive
+'''
+
+import time
+import threading
+import concurrent.futures
+
+from collections import deque
+
+
+class DaemonThreadPool(concurrent.futures.Executor):
+    """
+    A thread pool like ThreadPoolExecutor, except that its workers are
+    daemon threads. ThreadPoolExecutor joins its workers when the
+    interpreter exits, so a single task stuck on a hung NFS or FUSE
+    mount keeps the process alive forever. Here a task that takes too
+    long can be abandoned: its thread is left to finish (or hang) on
+    its own and a fresh thread takes its place in the pool.
+
+    Tasks can be submitted under a key, like the device they read
+    from, and `limit_for` caps how many tasks of the same key run at
+    once. Workers skip over keys that are at their limit and take the
+    next task that can run, taking turns between the keys, so a slow
+    device doesn't hold up the others. An abandoned task gives its slot
+    back right away, otherwise the tasks queued behind it would never
+    start and could never time out either.
+
+    Leaving the `with` block doesn't wait for running tasks either, the
+    tasks still queued are cancelled.
+    """
+
+    def __init__(self, max_workers: int, limit_for=None) -> None:
+        if max_workers <= 0:
+            raise ValueError('max_workers must be greater than 0')
+        self.max_workers = max_workers
+        self.limit_for = limit_for
+        self._cond = threading.Condition()
+        self._queues = {}  # key -> deque of tasks, in turn order
+        self._running = {}  # key -> number of tasks running
+        self._limits = {}
+        self._workers = 0
+        self._idle = 0
+        self._started = {}  # running future -> time.monotonic() it started
+        self._keys = {}  # running future -> its key
+        self._abandoned = set()
+        self._shutdown = False
+
+    def __exit__(self, *exc) -> bool:
+        self.shutdown(wait=False, cancel_futures=True)
+        return False
+
+    def submit(self, fn, *args, **kwargs) -> concurrent.futures.Future:
+        return self.submit_to(None, fn, *args, **kwargs)
+
+    def submit_to(self, key, fn, *args,
+                  **kwargs) -> concurrent.futures.Future:
+        """Submits a task that counts against the limit of `key`"""
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures '
+                                   + 'after shutdown')
+            if key not in self._limits:
+                # tasks without a key are only limited by the threads
+                self._limits[key] = None
+                if key is not None and self.limit_for is not None:
+                    self._limits[key] = max(1, self.limit_for(key))
+            future = concurrent.futures.Future()
+            self._queues.setdefault(key, deque()).append(
+                (future, fn, args, kwargs))
+            self._cond.notify()
+            self._adjust()
+        return future
+
+    def started(self, future: concurrent.futures.Future):
+        """
+        Returns:
+            float: time.monotonic() of when a running task started,
+                    None if it's still queued or already finished
+        """
+        return self._started.get(future)
+
+    def abandon(self, future: concurrent.futures.Future) -> bool:
+        """
+        Gives up on a running task. Its result is never waited for and
+        another thread is started in place of the one running it.
+
+        Returns:
+            bool: False if the task wasn't running anymore
+        """
+        with self._cond:
+            if future not in self._started or future.done():
+                return False
+            self._abandoned.add(future)
+            self._workers -= 1
+            self._running[self._keys.pop(future)] -= 1
+            # a task waiting on the key's limit can run now
+            self._cond.notify_all()
+            if self._queues:
+                self._adjust()
+        return True
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                for tasks in self._queues.values():
+                    for task in tasks:
+                        task[0].cancel()
+                self._queues.clear()
+            self._cond.notify_all()
+            if wait:
+                while self._workers:
+                    self._cond.wait()
+
+    def _adjust(self) -> None:
+        """Starts a new worker unless one is idle, has to hold the lock"""
+        if self._idle or self._workers >= self.max_workers:
+            return
+        self._workers += 1
+        threading.Thread(target=self._work, daemon=True,
+                         name=f'vizexdf_{self._workers}').start()
+
+    def _take(self):
+        """
+        Waits for a task whose key is under its limit, None once the pool
+        is shut down and there's nothing left to run. Has to hold the lock.
+        """
+        while True:
+            for key, tasks in self._queues.items():
+                limit = self._limits[key]
+                if limit is None or self._running.get(key, 0) < limit:
+                    task = tasks.popleft()
+                    # the key goes to the back of the line
+                    del self._queues[key]
+                    if tasks:
+                        self._queues[key] = tasks
+                    self._running[key] = self._running.get(key, 0) + 1
+                    self._keys[task[0]] = key
+                    return key, task
+            if self._shutdown and not self._queues:
+                return None
+            self._idle += 1
+            self._cond.wait()
+            self._idle -= 1
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                taken = self._take()
+                if taken is None:
+                    self._workers -= 1
+                    self._cond.notify_all()
+                    return
+            key, (future, fn, args, kwargs) = taken
+            if future.set_running_or_notify_cancel():
+                self._started[future] = time.monotonic()
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            with self._cond:
+                self._started.pop(future, None)
+                if future in self._abandoned:
+                    # someone else already took this worker's place
+                    # and the key's slot was given back with it
+                    self._abandoned.discard(future)
+                    return
+                self._keys.pop(future, None)
+                self._running[key] -= 1
@@ -0,0 +1,309 @@
+'''
+Single-pass directory tree scanning for vizexdf
+'''
+
+import os
+import math
+import time
+import random
+import threading
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterator, NamedTuple
+from ignore import IgnoreMatcher
+from .cache import SizeCache
+
+
+class ScanCancelled(Exception):
+    """Raised by the walk once its cancel event is set"""
+
+
+class ScanEntry(NamedTuple):
+    """
+    A single record produced by the tree walk. For directories the size
+    is the cumulative size of the whole subtree, for files it's the
+    size of the file itself.
+    """
+    path: str
+    size: int
+    depth: int
+    is_dir: bool
+
+
+class SizeEstimate(NamedTuple):
+    """
+    Size of a directory that's either exact or, when the walk ran out of
+    time, estimated with an error bound (95% confidence) around it.
+    """
+    size: int
+    error: int
+    exact: bool
+
+
+class ScanProgress:
+    """
+    Running totals of a walk, updated as every directory is listed so
+    another thread can tell how far a slow walk got.
+    """
+
+    def __init__(self) -> None:
+        self.size = 0
+        self.dirs = 0
+
+
+@dataclass
+class TreeScanner:
+    """
+    Walks a directory tree exactly once with os.scandir and adds up
+    the sizes bottom-up. Every file is stat'ed once through its DirEntry
+    and every directory gets its cumulative size from the walk itself,
+    so no subtree is ever traversed twice.
+
+    With a `cache` directories that haven't changed since the previous
+    scan are neither listed nor have their files stat'ed again. Cached
+    directories don't report their files, so the cache is only used
+    when `with_files` isn't set.
+
+    Setting the `cancel` event stops a running walk before it lists
+    the next directory, or within a thousand entries of a huge one.
+
+    With a `budget` (in seconds) estimate_size stops walking once the
+    time is up and extrapolates the size of what's left from samples.
+
+    With `progress` the sizes of the directories walked so far are
+    added up as the walk goes, for a partial size if it never finishes.
+
+    With `inode_order` the entries of every directory are stat'ed and
+    descended into in ascending inode order instead of the listing
+    order. On ext4 and xfs inode numbers roughly follow where the inodes
+    are on disk, so a cold walk of a spinning disk seeks a lot less.
+
+    With `ignore` entries it ignores are skipped as they're listed, so
+    ignored directories are never opened and don't count toward sizes.
+    The cache is not used then, since it doesn't know about the rules.
+    """
+
+    with_files: bool = False
+    cache: SizeCache = None
+    cancel: threading.Event = None
+    budget: float = None
+    progress: ScanProgress = None
+    inode_order: bool = False
+    ignore: IgnoreMatcher = None
+
+    # Share of the budget spent on sampling the subtrees not walked
+    PROBE_SHARE = 0.25
+    # Huge directories check for cancellation while being listed
+    CANCEL_CHECK_EVERY = 1024
+
+    def walk(self, start_path: str) -> Iterator[ScanEntry]:
+        """
+        Walks the tree rooted at a given path with an explicit stack.
+        Directories are yielded in post-order (children before their
+        parents) together with the cumulative size of their subtree.
+        If `with_files` is set files are yielded as well.
+
+        Args:
+            start_path (str): root of the tree to walk
+
+        Yields:
+            ScanEntry: files and directories of the tree, the root
+                    directory is always yielded last
+
+        Raises:
+            ScanCancelled: if the walk was cancelled half way
+        """
+        files = [] if self.with_files else None
+        stack = [self._count(self._scan_dir(start_path, 0, files))]
+        while stack:
+            if files:
+                yield from files
+                files.clear()
+            frame = stack[-1]
+            path, depth, size, subdirs = frame
+            if subdirs:
+                self._check_cancel(start_path)
+                stack.append(self._count(
+                    self._scan_dir(subdirs.pop(), depth + 1, files)))
+                continue
+            stack.pop()
+            if stack:
+                stack[-1][2] += size
+            yield ScanEntry(path, size, depth, True)
+
+    def dir_sizes(self, start_path: str) -> dict:
+        """
+        Collects cumulative sizes of all the directories in a tree.
+
+        Returns:
+            dict: directory path mapped to its cumulative size in bytes
+        """
+        return {
+            entry.path: entry.size
+            for entry in self.walk(start_path) if entry.is_dir
+        }
+
+    def total_size(self, start_path: str) -> int:
+        """Returns the cumulative size of a given directory in bytes"""
+        size = 0
+        for entry in self.walk(start_path):
+            if entry.is_dir and not entry.depth:
+                size = entry.size
+        return size
+
+    def own_size(self, path: str) -> int:
+        """Size of the files right in a directory, not in subdirectories"""
+        return self._scan_dir(path, 0, None)[2]
+
+    def estimate_size(self, start_path: str) -> SizeEstimate:
+        """
+        Calculates the cumulative size of a directory within the time
+        budget. The tree is walked breadth first until most of the budget
+        is used up. For the directories that were found but not walked,
+        the rest of the budget is spent on random probes: each probe
+        descends a random path picking one subdirectory per level, and
+        the sizes seen on the way weighted by the fan-out above them
+        give an unbiased estimate of a whole subtree (Knuth's estimator).
+        The top directory itself is always listed, however small the
+        budget is.
+
+        Returns:
+            SizeEstimate: exact size if the walk finished in time,
+                    otherwise the estimate and its error bound
+        """
+        if self.budget is None:
+            return SizeEstimate(self.total_size(start_path), 0, True)
+
+        start = time.monotonic()
+        walk_deadline = start + self.budget * (1 - self.PROBE_SHARE)
+        deadline = start + self.budget
+
+        size, walked = 0, 0
+        pending = deque([start_path])
+        while pending and (not walked or time.monotonic() < walk_deadline):
+            self._check_cancel(start_path)
+            _, _, own, subdirs = self._count(
+                self._scan_dir(pending.popleft(), 0, None))
+            size += own
+            walked += 1
+            pending.extend(reversed(subdirs))
+        if not pending:
+            return SizeEstimate(size, 0, True)
+
+        pending = list(pending)
+        rng = random.Random()
+        samples = []
+        while time.monotonic() < deadline:
+            self._check_cancel(start_path)
+            sample = self._probe(rng.choice(pending), rng, deadline)
+            if sample is None:
+                break
+            samples.append(sample)
+
+        if samples:
+            mean = sum(samples) / len(samples)
+            spread = mean
+            if len(samples) > 1:
+                spread = math.sqrt(
+                    sum((x - mean) ** 2 for x in samples) / (len(samples) - 1)
+                )
+            rest = len(pending) * mean
+            error = 1.96 * len(pending) * spread / math.sqrt(len(samples))
+        else:
+            # Nothing could be sampled in time, assume the directories
+            # left are as big as the ones that were walked
+            rest = error = len(pending) * size / max(walked, 1)
+        return SizeEstimate(int(size + rest), int(error), False)
+
+    def _probe(self, path: str, rng: random.Random, deadline: float):
+        """
+        Descends a random path from a given directory down to a leaf.
+
+        Returns:
+            float: estimated size of the subtree, None if out of time
+        """
+        estimate, weight = 0, 1
+        while time.monotonic() < deadline:
+            _, _, own, subdirs = self._scan_dir(path, 0, None)
+            estimate += weight * own
+            if not subdirs:
+                return estimate
+            weight *= len(subdirs)
+            path = rng.choice(subdirs)
+        return None
+
+    def _count(self, frame: list) -> list:
+        """Adds a listed directory to the progress, if it's tracked"""
+        if self.progress is not None:
+            self.progress.size += frame[2]
+            self.progress.dirs += 1
+        return frame
+
+    def _check_cancel(self, path: str) -> None:
+        if self.cancel is not None and self.cancel.is_set():
+            raise ScanCancelled(path)
+
+    def _scan_dir(self, path: str, depth: int, files: list) -> list:
+        """
+        Lists a single directory. Sizes of the files are added up right
+        away from the DirEntry's stat, and subdirectories are collected
+        to be descended into later. Symlinks to directories are neither
+        followed nor counted, same as os.walk does by default.
+
+        Returns:
+            list: a stack frame [path, depth, size, subdirs]
+        """
+        try:
+            if self.cache is None or files is not None \
+                    or self.ignore is not None:
+                return self._list_dir(path, depth, files)
+
+            stat = os.stat(path)
+            cached = self.cache.lookup(stat)
+            if cached is not None:
+                size, names = cached
+                subdirs = [os.path.join(path, name) for name in reversed(names)]
+                return [path, depth, size, subdirs]
+
+            frame = self._list_dir(path, depth, files)
+            names = [os.path.basename(sub) for sub in reversed(frame[3])]
+            self.cache.store(stat, frame[2], names)
+            return frame
+        except OSError:
+            # unreadable directories count as empty, like os.walk
+            return [path, depth, 0, []]
+
+    def _list_dir(self, path: str, depth: int, files: list) -> list:
+        """Scans a directory for its own files' size and subdirectories"""
+        size = 0
+        subdirs = []
+        with os.scandir(path) as entries:
+            if self.inode_order:
+                # inode numbers come with the listing, sorting is free
+                entries = sorted(entries, key=os.DirEntry.inode)
+            for count, entry in enumerate(entries, 1):
+                if not count % self.CANCEL_CHECK_EVERY:
+                    self._check_cancel(path)
+                try:
+                    is_dir = entry.is_dir()
+                    if self.ignore is not None and self.ignore.ignored(
+                            path, entry.name, is_dir):
+                        continue
+                    if is_dir:
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+                    file_size = entry.stat().st_size
+                except OSError:
+                    # Could be a broken symlink or some other weirdness.
+                    # Trap the error here so that the directory can
+                    # continue to be successfully processed.
+                    continue
+                size += file_size
+                if files is not None:
+                    files.append(
+                        ScanEntry(entry.path, file_size, depth + 1, False)
+                    )
+        subdirs.reverse()  # so they are popped in the listing order
+        return [path, depth, size, subdirs]
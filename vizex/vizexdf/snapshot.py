@@ -0,0 +1,188 @@
+'''
+Compact, memory-mappable snapshots of directory sizes for vizexdf
+'''
+
+import os
+import mmap
+import time
+import array
+import struct
+import numpy as np
+
+from .scanner import TreeScanner
+
+
+MAGIC = b'VZXSNAP\x01'
+# magic, number of directories, size of the names, creation time,
+# length of the root path
+HEADER = struct.Struct('<8sQQdI4x')
+RECORD = np.dtype([
+    ('parent', '<i4'),
+    ('name_len', '<u4'),
+    ('name_off', '<u8'),
+    ('size', '<u8'),
+])
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class Snapshot:
+    """
+    Cumulative sizes of every directory in a tree. On disk it's a fixed
+    header, followed by the root path, a packed array of records (index
+    of the parent, name and cumulative size of a directory) and a blob
+    of the names. Records are in post-order, so the root is always the
+    last one. Loading maps the file into memory instead of reading it,
+    so opening a snapshot of millions of directories is cheap and only
+    the parts that are looked at are ever read.
+    """
+
+    def __init__(self, root: str, records: np.ndarray, names,
+                 created: float) -> None:
+        self.root = root
+        self.records = records
+        self.names = names
+        self.created = created
+        self._children = None
+        self._mmap = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @classmethod
+    def from_scan(cls, path: str, scanner: TreeScanner = None) -> 'Snapshot':
+        """Scans a tree once and keeps the sizes of all its directories"""
+        parents = array.array('i')
+        name_lens = array.array('I')
+        name_offs = array.array('Q')
+        sizes = array.array('Q')
+        names = bytearray()
+        waiting = {}  # directories yet to be given the index of their parent
+        # children are matched to their parent by dirname, which a
+        # trailing slash on the root would never be equal to
+        path = os.path.normpath(path)
+
+        for index, entry in enumerate((scanner or TreeScanner()).walk(path)):
+            for child in waiting.pop(entry.path, ()):
+                parents[child] = index
+            name = os.fsencode(os.path.basename(entry.path)) \
+                if entry.depth else b''
+            parents.append(-1)
+            name_lens.append(len(name))
+            name_offs.append(len(names))
+            sizes.append(entry.size)
+            names += name
+            if entry.depth:
+                waiting.setdefault(
+                    os.path.dirname(entry.path), []).append(index)
+
+        records = np.empty(len(sizes), dtype=RECORD)
+        records['parent'] = np.frombuffer(parents, dtype=np.int32)
+        records['name_len'] = np.frombuffer(name_lens, dtype=np.uint32)
+        records['name_off'] = np.frombuffer(name_offs, dtype=np.uint64)
+        records['size'] = np.frombuffer(sizes, dtype=np.uint64)
+        return cls(os.path.abspath(path), records, bytes(names), time.time())
+
+    def save(self, filename: str) -> None:
+        """Writes the snapshot to a file"""
+        root = os.fsencode(self.root)
+        with open(filename, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, len(self.records), len(self.names),
+                                   self.created, len(root)))
+            file.write(root)
+            file.write(b'\0' * (_aligned(len(root)) - len(root)))
+            file.write(self.records.tobytes())
+            file.write(self.names)
+
+    @classmethod
+    def load(cls, filename: str) -> 'Snapshot':
+        """
+        Maps a snapshot file into memory.
+
+        Raises:
+            ValueError: if the file isn't a vizex snapshot
+        """
+        with open(filename, 'rb') as file:
+            # an empty file can't even be mapped
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise ValueError(f'{filename} is not a vizex snapshot')
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, names_size, created, root_len = \
+            HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            raise ValueError(f'{filename} is not a vizex snapshot')
+        offset = HEADER.size
+        root = os.fsdecode(mapped[offset:offset + root_len])
+        offset += _aligned(root_len)
+        records = np.frombuffer(mapped, dtype=RECORD, count=count,
+                                offset=offset)
+        offset += records.nbytes
+        names = memoryview(mapped)[offset:offset + names_size]
+        snapshot = cls(root, records, names, created)
+        snapshot._mmap = mapped
+        return snapshot
+
+    @property
+    def root_index(self) -> int:
+        return len(self.records) - 1
+
+    def size(self, index: int) -> int:
+        return int(self.records['size'][index])
+
+    def name(self, index: int) -> str:
+        record = self.records[index]
+        offset = int(record['name_off'])
+        return os.fsdecode(
+            bytes(self.names[offset:offset + int(record['name_len'])]))
+
+    def children(self, index: int) -> np.ndarray:
+        """Indices of the subdirectories of a directory"""
+        if self._children is None:
+            # group the records by their parent once, with a sort
+            parents = self.records['parent']
+            order = np.argsort(parents, kind='stable')
+            grouped = parents[order]
+            indices = np.arange(len(parents))
+            self._children = (
+                order,
+                np.searchsorted(grouped, indices, side='left'),
+                np.searchsorted(grouped, indices, side='right'),
+            )
+        order, starts, ends = self._children
+        return order[starts[index]:ends[index]]
+
+
+def diff(old: Snapshot, new: Snapshot) -> list:
+    """
+    Compares two snapshots top-down, matching directories by name and
+    descending only into the ones whose cumulative size changed, so
+    the work depends on how much of the tree changed and not on its
+    size. Subdirectories that only exist in one of the snapshots are
+    reported as a whole, without looking inside them.
+
+    Returns:
+        list: (path relative to the root, old size, new size) of every
+                directory that changed
+    """
+    changes = []
+    stack = [(old.root_index, new.root_index, '')]
+    while stack:
+        i, j, path = stack.pop()
+        before, after = old.size(i), new.size(j)
+        if before == after:
+            continue
+        changes.append((path or '.', before, after))
+        old_children = {old.name(child): child for child in old.children(i)}
+        for child in new.children(j):
+            name = new.name(child)
+            child_path = os.path.join(path, name)
+            match = old_children.pop(name, None)
+            if match is None:
+                changes.append((child_path, 0, new.size(child)))
+            else:
+                stack.append((match, child, child_path))
+        for name, child in old_children.items():
+            changes.append((os.path.join(path, name), old.size(child), 0))
+    return changes
@@ -0,0 +1,215 @@
+'''
+Live, event driven directory sizes for vizexdf (Linux inotify)
+'''
+
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+from .scanner import TreeScanner
+
+
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+
+EVENT = struct.Struct('iIII')  # wd, mask, cookie, len of the name
+
+
+class Inotify:
+    """Thin ctypes wrapper around the Linux inotify API"""
+
+    def __init__(self) -> None:
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'),
+                                 use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        """
+        Returns:
+            int: watch descriptor of the path
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            self._raise(path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: float = None) -> list:
+        """
+        Waits for events for at most `timeout` seconds.
+
+        Returns:
+            list: tuples of (wd, mask, name) of every event read
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buffer = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT.unpack_from(buffer, offset)
+            offset += EVENT.size
+            name = buffer[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+    @staticmethod
+    def _raise(path: str = None) -> None:
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code), path)
+
+
+class LiveTree:
+    """
+    Cumulative sizes of every directory under a path, kept up to date by
+    inotify events instead of rescanning. The tree is scanned once and
+    every directory gets a watch. When events come in, only directories
+    that had files changed get their own files stat'ed again, and the
+    difference is added to them and their ancestors. New subdirectories
+    are scanned on their own and removed ones are subtracted.
+    """
+
+    def __init__(self, path: str, inotify: Inotify) -> None:
+        self.path = os.path.normpath(path)
+        self.inotify = inotify
+        self.totals = {}
+        self._own = {}
+        self._parent = {}
+        self._children = {}
+        self._watches = {}  # wd -> directory
+        self._wds = {}  # directory -> wd
+        self._watch_error = None
+        self._add_subtree(self.path, None)
+
+    def size(self, path: str) -> int:
+        """Cumulative size of a directory in the tree"""
+        return self.totals.get(path, 0)
+
+    def update(self, timeout: float = None) -> bool:
+        """
+        Waits for events and applies them to the sizes.
+
+        Returns:
+            bool: whether anything in the tree changed
+        """
+        events = self.inotify.read(timeout)
+        dirty = set()
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, nothing is known for sure anymore
+                self._remove_subtree(self.path)
+                self._add_subtree(self.path, None)
+                return True
+            folder = self._watches.get(wd)
+            if folder is None:
+                continue
+            path = os.path.join(folder, name)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                if path in self.totals:
+                    self._remove_subtree(path)  # replaced by a rename
+                self._add_subtree(path, folder)
+            elif mask & IN_ISDIR and mask & (IN_DELETE | IN_MOVED_FROM):
+                if path in self.totals:
+                    self._remove_subtree(path)
+            else:
+                dirty.add(folder)
+
+        scanner = TreeScanner()
+        for folder in dirty:
+            if folder in self.totals:
+                own = scanner.own_size(folder)
+                self._propagate(folder, own - self._own[folder])
+                self._own[folder] = own
+        return bool(events)
+
+    def _add_subtree(self, path: str, parent: str) -> None:
+        """Scans a new subtree and adds its size to the ancestors"""
+        for entry in TreeScanner().walk(path):
+            folder = entry.path
+            children = self._children.setdefault(folder, set())
+            self.totals[folder] = entry.size
+            self._own[folder] = entry.size - sum(
+                self.totals[child] for child in children)
+            if folder != path:
+                self._parent[folder] = os.path.dirname(folder)
+                self._children.setdefault(
+                    self._parent[folder], set()).add(folder)
+            self._watch(folder)
+        if parent is not None:
+            self._parent[path] = parent
+            self._children[parent].add(path)
+            self._propagate(parent, self.totals[path])
+
+    def _remove_subtree(self, path: str) -> None:
+        """Forgets about a removed subtree and its size"""
+        parent = self._parent.pop(path, None)
+        if parent is not None:
+            self._children[parent].discard(path)
+            self._propagate(parent, -self.totals[path])
+        stack = [path]
+        while stack:
+            folder = stack.pop()
+            stack.extend(self._children.pop(folder, ()))
+            self._parent.pop(folder, None)
+            self.totals.pop(folder, None)
+            self._own.pop(folder, None)
+            wd = self._wds.pop(folder, None)
+            if wd is not None:
+                del self._watches[wd]
+                self.inotify.rm_watch(wd)
+
+    def _propagate(self, folder: str, delta: int) -> None:
+        """Adds a change of size to a directory and all its ancestors"""
+        while folder is not None:
+            self.totals[folder] += delta
+            folder = self._parent.get(folder)
+
+    def _watch(self, folder: str) -> None:
+        try:
+            wd = self.inotify.add_watch(folder)
+        except OSError as e:
+            # Typically running out of max_user_watches, the sizes
+            # under this directory won't be live then
+            if self._watch_error is None:
+                print(f"Can't watch {folder} ::> {e}", file=sys.stderr)
+            self._watch_error = e
+            return
+        self._watches[wd] = folder
+        self._wds[folder] = wd
@@ -151,8 +151,12 @@ class HorizontalBarChart(Chart):
         if footer:
             print(stylize(footer, self.options.text_color))
 
-    def draw_horizontal_bar(self, maximum: int, current: int) -> str:
-        """Draw a horizontal bar chart"""
+    def draw_horizontal_bar(self, maximum: int, current: int,
+                            width: int = 38) -> str:
+        """
+        Draw a horizontal bar chart of `width` symbols, followed by the
+        marker of the current value, so it's `width` + 1 symbols long
+        """
 
         # Sanity check that numbers add up
         if current > maximum:
@@ -165,13 +169,13 @@ class HorizontalBarChart(Chart):
             maximum = 0
 
         text_bar = ""
-        usage = int((current / maximum) * 38)
+        usage = int((current / maximum) * width)
 
         for _ in range(1, usage + 1):
             text_bar += self.options.fsymbol
         text_bar += self.options.msymbol
 
-        for _ in range(1, 39 - usage):
+        for _ in range(1, width + 1 - usage):
             text_bar += self.options.esymbol
 
         # Check if the user set up graph color
@@ -0,0 +1,90 @@
+'''
+Rule based highlighting of entry names for vizextree
+'''
+
+import re
+
+from typing import NamedTuple, Optional
+
+
+class HighlightRule(NamedTuple):
+    """
+    Names the pattern is found in (case-insensitive regular expression)
+    are highlighted with the color and style. A rule for directories
+    only doesn't apply to files.
+    """
+    pattern: str
+    color: Optional[str]
+    style: Optional[str] = None
+    dirs_only: bool = False
+
+
+DEFAULT_RULES = (
+    HighlightRule(r'\btests?\b', 'sky_blue_2', 'bold'),
+    HighlightRule(r'\b(src|main)\b', 'chartreuse_2b', 'bold'),
+    HighlightRule(r'\bvenv\b', 'purple_1a', 'dim'),
+    HighlightRule(r'^\.', 'dark_gray', 'dim'),
+    HighlightRule(r'^(build|node_modules)$', 'dark_gray', 'dim',
+                  dirs_only=True),
+)
+
+
+def parse_rule(text: str) -> HighlightRule:
+    """
+    Parses a rule written as PATTERN=COLOR[:STYLE], a pattern ending
+    with a slash only applies to directories, e.g. 'dist/=grey_50:dim'
+
+    Raises:
+        ValueError: if the rule or its pattern isn't valid
+    """
+    pattern, sep, look = text.rpartition('=')
+    if not sep or not pattern or not look:
+        raise ValueError(f"'{text}' should be PATTERN=COLOR[:STYLE]")
+    color, _, style = look.partition(':')
+    dirs_only = pattern.endswith('/')
+    if dirs_only:
+        pattern = pattern[:-1]
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Bad pattern in '{text}' ::> {e}")
+    return HighlightRule(pattern, color or None, style or None, dirs_only)
+
+
+class NameClassifier:
+    """
+    Picks the highlighting of entry names from a table of rules, the
+    first rule that matches wins. All the rules are compiled once into
+    a single regular expression (one for directories and one for files),
+    where every rule is an alternative that looks ahead for its pattern
+    from the start of the name. So a name is matched in one call, and
+    earlier rules still win over later ones.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES) -> None:
+        self.rules = tuple(rules)
+        self._patterns = {
+            is_dir: self._compile(is_dir) for is_dir in (True, False)
+        }
+
+    def classify(self, name: str, is_dir: bool = False) -> tuple:
+        """
+        Returns:
+            tuple: color and style of the name, Nones if no rule matches
+        """
+        pattern = self._patterns[is_dir]
+        match = pattern.match(name) if pattern else None
+        if match is None:
+            return None, None
+        rule = self.rules[int(match.lastgroup[1:])]
+        return rule.color, rule.style
+
+    def _compile(self, is_dir: bool):
+        alternatives = [
+            f'(?P<r{index}>(?=.*?(?:{rule.pattern})))'
+            for index, rule in enumerate(self.rules)
+            if is_dir or not rule.dirs_only
+        ]
+        if not alternatives:
+            return None
+        return re.compile('|'.join(alternatives), re.IGNORECASE | re.DOTALL)
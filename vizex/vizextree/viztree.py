@@ -1,8 +1,17 @@
-from pathlib import Path
-from itertools import islice
-from tools import find_word
+import os
+import sys
+import concurrent.futures
 
-from colored import fg, attr, stylize
+from typing import NamedTuple
+from pathlib import Path
+from collections import deque
+from itertools import chain, islice
+from dataclasses import dataclass
+from colored import fg, attr
+from tools import bytes_to_human_readable
+from ignore import IgnoreMatcher
+from vizexdu.charts import HorizontalBarChart
+from .highlight import NameClassifier
 
 
 SPACE = '    '
@@ -10,76 +19,601 @@ BRANCH = '│   '
 TEE = '├── '
 LEAF = '└── '
 
+# directories listed ahead of the walk at once
+PREFETCH_WIDTH = 8
+
+# symbols in the size bars of --sizes
+BAR_WIDTH = 10
+
 FILES_COUNT = 0
 DIRS_COUNT = 0
 
 
+class TreeRenderer:
+    """
+    Writes lines of the tree to a stream in big chunks instead of one
+    write per line. The prefix of a line is written as it is and only
+    the name gets a single color span around it. Escape codes of every
+    color and style are built once. If the stream isn't a terminal
+    nothing is colored at all.
+    """
+
+    BUFFER_SIZE = 1 << 16
+
+    def __init__(self, stream=None, color: bool = None) -> None:
+        self.stream = stream or sys.stdout
+        if color is None:
+            color = self.stream.isatty()
+        self.color = color
+        self._chunks = []
+        self._size = 0
+        self._codes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+
+    def line(self, head: str, name: str, color: str = None,
+             style: str = None) -> None:
+        """Adds a line of the head followed by the (colored) name"""
+        if self.color and (color or style):
+            codes = self._codes.get((color, style))
+            if codes is None:
+                codes = self._codes[(color, style)] = (
+                    (attr(style) if style else '')
+                    + (fg(color) if color else ''))
+            name = codes + name + attr('reset')
+        self.write(head + name + '\n')
+
+    def write(self, text: str) -> None:
+        self._chunks.append(text)
+        self._size += len(text)
+        if self._size >= self.BUFFER_SIZE:
+            self.flush()
+
+    def paint(self, text, color: str) -> str:
+        """Colors a piece of text, if colors are on"""
+        if not self.color:
+            return str(text)
+        return f'{fg(color)}{text}{attr("reset")}'
+
+    def flush(self) -> None:
+        if self._chunks:
+            self.stream.write(''.join(self._chunks))
+            self._chunks.clear()
+            self._size = 0
+        self.stream.flush()
+
+
 def construct_tree(dir_path: str, level: int, only_dirs: bool = False,
-                   max_length: int = 1000) -> None:
+                   max_length: int = 1000, inode_order: bool = False,
+                   stream=None, classifier: NameClassifier = None,
+                   prefetch: int = PREFETCH_WIDTH,
+                   max_children: int = None, sizes: bool = False,
+                   ignore: IgnoreMatcher = None) -> None:
+    global FILES_COUNT, DIRS_COUNT
+    FILES_COUNT = DIRS_COUNT = 0
     dir_path = Path(dir_path)
-    print_colored(str(dir_path), 'red', 'bold')
-    iterator = generate_iterable(
-        dir_path, level=level, only_dirs=only_dirs)
-    for line in islice(iterator, max_length):
-        filter_project_dirs(line)
-    if next(iterator, None):
-        print(f'... length limit of {max_length} is reached! counted:')
-    print(f'\n{stylize(DIRS_COUNT, fg(172))} directories'
-          + (f', {stylize(FILES_COUNT, fg(12))} files' if FILES_COUNT else ''))
+    classifier = classifier or NameClassifier()
+    with TreeRenderer(stream) as renderer, \
+            DirectoryPrefetcher(prefetch, inode_order, ignore) as prefetcher:
+        if sizes:
+            root = size_tree(dir_path, level, only_dirs, inode_order, ignore)
+            renderer.line('', f'{dir_path} '
+                          + f'[{bytes_to_human_readable(root.size)}]',
+                          'red', 'bold')
+            iterator = generate_sized(root, max_children)
+        else:
+            renderer.line('', str(dir_path), 'red', 'bold')
+            iterator = generate_iterable(
+                dir_path, level=level, only_dirs=only_dirs,
+                inode_order=inode_order, prefetcher=prefetcher,
+                max_children=max_children)
+        for head, name, is_dir in islice(iterator, max_length):
+            if is_dir is None:  # entries left out of a directory
+                renderer.line(head, name, None, 'dim')
+                continue
+            renderer.line(head, name, *classifier.classify(name, is_dir))
+        dirs, files = DIRS_COUNT, FILES_COUNT
+        if next(iterator, None):
+            renderer.write(
+                f'... length limit of {max_length} is reached! counted:\n')
+            if sizes:
+                # the sized tree is already in memory, counting is cheap
+                for _ in iterator:
+                    pass
+                dirs, files = DIRS_COUNT, FILES_COUNT
+            else:
+                # the rest of the tree is counted without being rendered
+                iterator.close()
+                levels = count_tree(dir_path, level, only_dirs,
+                                    inode_order, max_children, prefetch,
+                                    ignore)
+                dirs = sum(count.dirs for count in levels)
+                files = sum(count.files for count in levels)
+        renderer.write('\n' + _totals(renderer, dirs, files))
+
+
+def print_counts(dir_path: str, level: int, only_dirs: bool = False,
+                 inode_order: bool = False, max_children: int = None,
+                 workers: int = PREFETCH_WIDTH, stream=None,
+                 ignore: IgnoreMatcher = None) -> None:
+    """Prints how many directories and files every level of a tree has"""
+    levels = count_tree(dir_path, level, only_dirs, inode_order,
+                        max_children, workers, ignore)
+    with TreeRenderer(stream) as renderer:
+        renderer.line('', str(dir_path), 'red', 'bold')
+        for depth, count in enumerate(levels, 1):
+            renderer.write(f'level {depth}: '
+                           + _totals(renderer, count.dirs, count.files))
+        renderer.write('\n' + _totals(
+            renderer, sum(count.dirs for count in levels),
+            sum(count.files for count in levels)))
+
+
+def _totals(renderer: TreeRenderer, dirs: int, files: int) -> str:
+    return (f'{renderer.paint(dirs, 172)} directories'
+            + (f', {renderer.paint(files, 12)} files' if files else '')
+            + '\n')
 
 
 def generate_iterable(dir_path: Path, prefix: str = '',
-                      level=-1, only_dirs: bool = False) -> str:
+                      level=-1, only_dirs: bool = False,
+                      inode_order: bool = False,
+                      prefetcher: 'DirectoryPrefetcher' = None,
+                      max_children: int = None,
+                      ignore: IgnoreMatcher = None):
+    """
+    Yields lines of the tree as the prefix with its pointer, the name
+    of the entry, so they can be colored separately, and whether the
+    entry is a directory.
+
+    With max_children only that many entries of a directory are listed,
+    the rest of them are just counted and summed up in one last line,
+    which comes with None for whether it's a directory.
+
+    The tree is walked with an explicit stack of the directories being
+    listed, so it goes as deep as the filesystem does. Entries are
+    streamed out of scandir and only the one after the current entry
+    is read ahead, to tell whether the current one is the last of its
+    directory. So memory depends on the depth of the tree and not the
+    size of its directories. Directories are opened by the prefetcher
+    if one is given, which then has the ignore rules too.
+    """
     global FILES_COUNT, DIRS_COUNT
     if not level:
         return  # stop iterating
 
-    if only_dirs:
-        contents = [d for d in dir_path.iterdir() if d.is_dir()]
-    else:
-        contents = list(dir_path.iterdir())
+    if prefetcher is None:
+        prefetcher = DirectoryPrefetcher(0, inode_order, ignore)
+
+    def following(entries):
+        for entry in entries:
+            if entry[2] or not only_dirs:
+                return entry
+        return None
+
+    # frames of [entries, prefix, level, entry to yield next, yielded]
+    entries = prefetcher.open(os.fspath(dir_path), level != 1,
+                              max_children, only_dirs)
+    stack = [[entries, prefix, level, following(entries), 0]]
+    try:
+        while stack:
+            frame = stack[-1]
+            entries, prefix, level, current, shown = frame
+            if current is not None and shown == max_children:
+                dirs, files = count_entries(entries, current)
+                DIRS_COUNT += dirs
+                FILES_COUNT += files
+                yield (prefix + LEAF, f'… and {dirs + files} more '
+                       + f'({dirs} dirs, {files} files)', None)
+                current = None
+            if current is None:
+                entries.close()
+                stack.pop()
+                continue
+            frame[3] = following(entries)
+            frame[4] += 1
+            pointer = LEAF if frame[3] is None else TEE
+            name, path, is_dir = current
+            if is_dir:
+                yield prefix + pointer, name, True
+                DIRS_COUNT += 1
+                if level != 1:
+                    extension = SPACE if pointer == LEAF else BRANCH
+                    entries = prefetcher.open(path, level != 2,
+                                              max_children, only_dirs)
+                    stack.append([entries, prefix + extension, level - 1,
+                                  following(entries), 0])
+            else:
+                yield prefix + pointer, name, False
+                FILES_COUNT += 1
+    finally:
+        for entries, *_ in stack:
+            entries.close()
+
+
+def count_entries(entries, first: tuple = None) -> tuple:
+    """
+    Counts what's left of a directory stream. Whether an entry is a
+    directory comes with the listing (d_type), so only symlinks get
+    stat'ed, to see what they point to.
+
+    Returns:
+        tuple: number of directories and number of files
+    """
+    dirs = files = 0
+    if first is not None:
+        entries = chain((first,), entries)
+    for _, _, is_dir in entries:
+        if is_dir:
+            dirs += 1
+        else:
+            files += 1
+    return dirs, files
+
 
-    pointers = [TEE] * (len(contents) - 1) + [LEAF]
-    for pointer, path in zip(pointers, contents):
-        if path.is_dir():
-            yield prefix + pointer + path.name
+@dataclass
+class SizedEntry:
+    """An entry with its cumulative size, and entries if it's shown"""
+    name: str
+    is_dir: bool
+    size: int = 0
+    children: list = None
+
+
+def size_tree(dir_path: str, level: int = -1, only_dirs: bool = False,
+              inode_order: bool = False,
+              ignore: IgnoreMatcher = None) -> SizedEntry:
+    """
+    Walks the whole tree once, bottom-up, summing up the sizes of files
+    into every directory above them (like the vizexdf scanner, symlinked
+    directories aren't followed). Only the levels the tree shows are
+    kept as entries, everything below them is just added up.
+
+    Returns:
+        SizedEntry: of dir_path, with the shown entries as children
+    """
+    root = SizedEntry(os.fspath(dir_path), True, children=[])
+    # frames of (entries, sized entry, levels left to show)
+    stack = [(_sized_entries(root.name, inode_order, ignore), root, level)]
+    while stack:
+        entries, parent, level = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            if stack:
+                stack[-1][1].size += parent.size
+            continue
+        name, path, is_dir, follow, size = entry
+        parent.size += size
+        child = parent
+        if level and (is_dir or not only_dirs):
+            child = SizedEntry(name, is_dir, size,
+                               [] if is_dir and level != 1 else None)
+            parent.children.append(child)
+        if follow:
+            if child is parent:  # below the shown levels, only sums
+                child = SizedEntry(name, True)
+            stack.append((_sized_entries(path, inode_order, ignore), child,
+                          level - 1 if level > 1 or level < 0 else 0))
+    return root
+
+
+def _sized_entries(dir_path: str, inode_order: bool,
+                   ignore: IgnoreMatcher = None):
+    """
+    Yields:
+        tuple: (name, path, is directory, walk into it, size) of every
+                entry of a directory that isn't ignored, sizes of files
+                only
+    """
+    try:
+        with os.scandir(dir_path) as entries:
+            if inode_order:
+                entries = sorted(entries, key=os.DirEntry.inode)
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                    if ignore is not None and ignore.ignored(
+                            dir_path, entry.name, is_dir):
+                        continue
+                    if is_dir:
+                        yield (entry.name, entry.path, True,
+                               not entry.is_symlink(), 0)
+                        continue
+                    size = entry.stat().st_size
+                except OSError:
+                    size = 0  # broken symlinks and the like
+                yield entry.name, entry.path, False, False, size
+    except OSError:
+        return
+
+
+def generate_sized(root: SizedEntry, max_children: int = None,
+                   width: int = BAR_WIDTH):
+    """
+    Yields lines of a sized tree like generate_iterable does, the
+    biggest entries first, each one with its size, its share of the
+    directory it's in and a bar of that share.
+    """
+    global FILES_COUNT, DIRS_COUNT
+    chart = HorizontalBarChart()
+    stack = [(_shown(root, max_children), 0, '', root.size)]
+    while stack:
+        children, index, prefix, total = stack.pop()
+        if index == len(children):
+            continue
+        stack.append((children, index + 1, prefix, total))
+        child = children[index]
+        last = index == len(children) - 1
+        share = child.size / total if total else 0
+        bar = chart.draw_horizontal_bar(max(total, 1), child.size, width)
+        yield (prefix + (LEAF if last else TEE)
+               + f'[{bytes_to_human_readable(child.size):>9} '
+               + f'{share:6.1%} {bar}] ', child.name, child.is_dir)
+        if child.is_dir is None:
+            continue
+        if child.is_dir:
             DIRS_COUNT += 1
-            extension = BRANCH if pointer == TEE else SPACE
-            yield from generate_iterable(
-                path, prefix=prefix + extension, level=level - 1)
-        elif not only_dirs:
-            yield prefix + pointer + path.name
+        else:
             FILES_COUNT += 1
+        if child.children:
+            stack.append((_shown(child, max_children), 0,
+                          prefix + (SPACE if last else BRANCH), child.size))
 
 
-def filter_project_dirs(line: str) -> None:
-    if find_word('test', line) or find_word('tests', line):
-        print_colored(line, 'sky_blue_2', 'bold')
-    elif find_word('src', line) or find_word('main', line):
-        print_colored(line, 'chartreuse_2b', 'bold')
-    elif find_word('venv', line):
-        print_colored(line, 'purple_1a', 'dim')
-    elif is_hidden(line):
-        print_colored(line, 'dark_gray', 'dim')
-    else:
-        print(line)
-
-
-def print_colored(line: str, color: str = None,
-                  style: str = None) -> None:
-    for c in line:
-        if c not in ('├', '─', '│', '└'):
-            print(stylize(c, attr(style) + fg(color)), end='')
-        else:
-            print(c, end='')
-    print()
+def _shown(entry: SizedEntry, max_children: int = None) -> list:
+    """Children in the order they are shown, with what's left summed up"""
+    global FILES_COUNT, DIRS_COUNT
+    children = sorted(entry.children, key=lambda child: child.size,
+                      reverse=True)
+    if max_children is None or len(children) <= max_children:
+        return children
+    rest = children[max_children:]
+    dirs = sum(child.is_dir for child in rest)
+    files = len(rest) - dirs
+    DIRS_COUNT += dirs
+    FILES_COUNT += files
+    return children[:max_children] + [SizedEntry(
+        f'… and {len(rest)} more ({dirs} dirs, {files} files)', None,
+        sum(child.size for child in rest))]
 
 
-def is_hidden(line: str) -> bool:
-    for c in line:
-        if c in ('├', '─', '│', '└', ' '):
+class LevelCount(NamedTuple):
+    dirs: int
+    files: int
+
+
+def count_tree(dir_path: str, level: int = -1, only_dirs: bool = False,
+               inode_order: bool = False, max_children: int = None,
+               workers: int = PREFETCH_WIDTH,
+               ignore: IgnoreMatcher = None) -> list:
+    """
+    Counts the entries of a tree level by level, the same entries the
+    tree would show, but without building or rendering any lines.
+    Whether an entry is a directory comes with the listing (d_type).
+    The subtrees of the top-level directories are counted in parallel.
+
+    Returns:
+        list: LevelCount of every level, starting from the entries of
+                dir_path itself
+    """
+    if not level:
+        return []
+    levels = [[0, 0]]
+    subtrees = _count_dir(os.fspath(dir_path), level, levels[0], only_dirs,
+                          inode_order, max_children, ignore)
+    with concurrent.futures.ThreadPoolExecutor(max(1, workers)) as executor:
+        for counts in executor.map(
+                lambda path: _count_levels(path, level - 1, only_dirs,
+                                           inode_order, max_children,
+                                           ignore),
+                subtrees):
+            for depth, (dirs, files) in enumerate(counts, 1):
+                if depth == len(levels):
+                    levels.append([0, 0])
+                levels[depth][0] += dirs
+                levels[depth][1] += files
+    return [LevelCount(*counts) for counts in levels if any(counts)]
+
+
+def _count_levels(dir_path: str, level: int, only_dirs: bool,
+                  inode_order: bool, max_children: int,
+                  ignore: IgnoreMatcher) -> list:
+    """Counts of every level of a subtree, walked with an explicit stack"""
+    levels = []
+    stack = [(dir_path, level, 0)]
+    while stack:
+        path, level, depth = stack.pop()
+        if depth == len(levels):
+            levels.append([0, 0])
+        stack.extend((child, level - 1, depth + 1) for child in _count_dir(
+            path, level, levels[depth], only_dirs, inode_order,
+            max_children, ignore))
+    return levels
+
+
+def _count_dir(dir_path: str, level: int, counts: list, only_dirs: bool,
+               inode_order: bool, max_children: int,
+               ignore: IgnoreMatcher) -> list:
+    """
+    Adds the directories and files of a directory to counts.
+
+    Returns:
+        list: paths of the subdirectories the tree would descend into
+    """
+    subdirs = []
+    shown = 0
+    for _, path, is_dir in stream_dir(dir_path, inode_order, ignore):
+        if is_dir:
+            counts[0] += 1
+            if level != 1 and shown != max_children:
+                subdirs.append(path)
+        elif only_dirs:
             continue
-        return c == '.'
+        else:
+            counts[1] += 1
+        if shown != max_children:
+            shown += 1
+    return subdirs
+
+
+def stream_dir(dir_path: str, inode_order: bool = False,
+               ignore: IgnoreMatcher = None):
+    """
+    Streams the contents of a directory. With inode_order they're sorted
+    by their inode numbers, which come with the listing, so they get
+    stat'ed roughly in the order they are laid out on disk (sorting has
+    to read the whole listing first). Entries the ignore rules ignore
+    are left out, so ignored directories are never opened. Directories
+    that can't be read are empty.
+
+    Yields:
+        tuple: (name, path, is directory) of every entry
+    """
+    try:
+        with os.scandir(dir_path) as entries:
+            if inode_order:
+                entries = sorted(entries, key=os.DirEntry.inode)
+            for entry in entries:
+                entry_is_dir = is_dir(entry)
+                if ignore is not None and ignore.ignored(
+                        dir_path, entry.name, entry_is_dir):
+                    continue
+                yield entry.name, entry.path, entry_is_dir
+    except OSError:
+        return
+
+
+def is_dir(entry: os.DirEntry) -> bool:
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _chain(head: list, rest):
+    """Entries read ahead followed by the rest of the stream"""
+    try:
+        yield from head
+        yield from rest
+    finally:
+        rest.close()
+
+
+def _close_rest(future: concurrent.futures.Future) -> None:
+    """Closes the stream of a directory read ahead but never walked"""
+    if future.exception() is None:
+        future.result()[1].close()
+
+
+class DirectoryPrefetcher:
+    """
+    Opens directories ahead of the walk in a thread pool, so on high
+    latency storage `width` directories are being read instead of one.
+    Only the first HEAD_SIZE entries of a directory are read ahead, the
+    rest is streamed when the walk gets to it.
+
+    The tree still comes out strictly depth-first: directories found
+    (among the entries read ahead) but not walked yet are kept in the
+    order the walk is going to get to them, subdirectories of the
+    directory just opened go to the front, and those the walk went past
+    without opening are dropped. Every time a directory is opened the
+    window moves on, the next `width` directories are being read and
+    those pushed out of it are taken back unless they already started.
+    With a width of 0 everything is streamed right when it's needed.
+    """
+
+    # entries of a directory read together with opening it
+    HEAD_SIZE = 64
+
+    def __init__(self, width: int = PREFETCH_WIDTH,
+                 inode_order: bool = False,
+                 ignore: IgnoreMatcher = None) -> None:
+        self.width = width
+        self.inode_order = inode_order
+        self.ignore = ignore
+        self._ahead = deque()  # directories yet to walk, in walk order
+        self._heads = {}  # path -> future of its head and the rest
+        self._executor = None
+        if width:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                width, thread_name_prefix='vizextree')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def open(self, path: str, descend: bool = True,
+             max_children: int = None, only_dirs: bool = False):
+        """
+        Opens a directory, starting from the entries read ahead if there
+        are any. If the walk is going to descend into its subdirectories
+        those among the entries read ahead are queued to be read next,
+        with max_children only those among the entries the walk lists.
+
+        Returns:
+            generator: of (name, path, is directory) of every entry
+        """
+        if self._executor is None:
+            return stream_dir(path, self.inode_order, self.ignore)
+        if path in self._ahead:
+            # directories queued before it come earlier in the walk, so
+            # the walk went past them and isn't getting to them anymore
+            while True:
+                skipped = self._ahead.popleft()
+                if skipped == path:
+                    break
+                self._drop(skipped)
+        future = self._heads.pop(path, None)
+        if future is not None:
+            head, rest = future.result()
+        else:
+            head, rest = self._read_head(path)  # wasn't read ahead
+        if descend:
+            listed = [entry for entry in head if entry[2] or not only_dirs]
+            self._ahead.extendleft(reversed(
+                [entry[1] for entry in listed[:max_children] if entry[2]]))
+        self._fill()
+        return _chain(head, rest)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        for path in list(self._heads):
+            self._drop(path)
+        self._ahead.clear()
+
+    def _read_head(self, path: str) -> tuple:
+        rest = stream_dir(path, self.inode_order, self.ignore)
+        return list(islice(rest, self.HEAD_SIZE)), rest
+
+    def _drop(self, path: str) -> None:
+        """
+        Forgets a directory read ahead, its stream is closed as soon as
+        it's read if it already started
+        """
+        future = self._heads.pop(path, None)
+        if future is not None and not future.cancel():
+            future.add_done_callback(_close_rest)
+
+    def _fill(self) -> None:
+        """Keeps the next `width` directories in walk order being read"""
+        window = list(islice(self._ahead, self.width))
+        for path in set(self._heads).difference(window):
+            # pushed out by directories the walk gets to sooner, what
+            # already started is kept for when the walk gets there
+            if self._heads[path].cancel():
+                del self._heads[path]
+        for path in window:
+            if path not in self._heads:
+                self._heads[path] = self._executor.submit(
+                    self._read_head, path)
 
 
 if __name__ == '__main__':